@@ -1,10 +1,14 @@
 import streamlit as st
-import pickle
 import pandas as pd
-import requests
 import os
 from datetime import datetime
-import time
+from api_client import RECOMMENDER_API_URL, APIError, RecommenderAPIClient
+from artifacts import load_model
+from metadata_store import MetadataStore
+from recommender import Recommender, apply_metadata
+from serving import RECOMMEND_CACHE_SIZE, RECOMMEND_CACHE_TTL
+from title_index import SearchIndex
+from tmdb_client import HealthProbe, TMDBClient
 
 
 # Configure page
@@ -78,107 +82,153 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def check_internet_connection():
-    """Check if internet connection is available for TMDB API"""
-    try:
-        response = requests.get("https://api.themoviedb.org/3", timeout=5)
-        return True
-    except (requests.RequestException, requests.exceptions.ConnectionError):
-        return False
+NO_POSTER = "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iNTAwIiBoZWlnaHQ9Ijc1MCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj4KICA8cmVjdCB3aWR0aD0iNTAwIiBoZWlnaHQ9Ijc1MCIgZmlsbD0iIzMzMzMzMyIvPgogIDx0ZXh0IHg9IjUwJSIgeT0iNTAlIiBmb250LWZhbWlseT0iQXJpYWwsIHNhbnMtc2VyaWYiIGZvbnQtc2l6ZT0iMjQiIGZpbGw9IndoaXRlIiB0ZXh0LWFuY2hvcj0ibWlkZGxlIiBkeT0iLjNlbSI+Tm8gSW1hZ2UgQXZhaWxhYmxlPC90ZXh0Pgo8L3N2Zz4="
 
 
-def fetch_poster(movie_id):
-    """Fetch movie poster from TMDB API"""
-    try:
-        response = requests.get(
-            f"https://api.themoviedb.org/3/movie/{movie_id}?api_key=75b3c80c1a67275c04868a92f6f50a4b",
-            timeout=10
-        )
-        response.raise_for_status()  # Raise an exception for bad status codes
-        data = response.json()
-        if "poster_path" in data and data["poster_path"]:
-            return "https://image.tmdb.org/t/p/w500/" + data["poster_path"]
+@st.cache_resource
+def get_tmdb_client():
+    """One pooled, cached TMDB client shared by every session"""
+    return TMDBClient(timeout=10, store=MetadataStore())
+
+
+@st.cache_resource
+def get_api_client():
+    """Pooled, cached client of the recommendation API, None to serve from an in-process model"""
+    return RecommenderAPIClient(RECOMMENDER_API_URL) if RECOMMENDER_API_URL else None
+
+
+@st.cache_resource
+def get_health_probe():
+    """Background check of the connection (to the API, or to TMDB), shared by every session"""
+    if api is not None:
+        return HealthProbe(api, path="/health").start()
+    return HealthProbe(get_tmdb_client()).start()
+
+
+DETAILS_OPTIONS = {'overview_length': 150, 'unavailable': "Details unavailable (offline mode)"}
+
+
+def recommend(selected, weights=None):
+    """Recommendations for one movie or several (optionally weighted) favorites
+
+    Returns (recommendations, complete), or (None, False) when a movie is not in
+    the catalog. Complete recommendations already carry poster and details:
+    they are kept in the response cache of the shared recommender (LRU,
+    RECOMMEND_CACHE_SIZE entries, RECOMMEND_CACHE_TTL seconds), so every
+    session asking for the same movies reuses them. In API mode the API
+    attaches them and the client caches its answers.
+    """
+    if api is not None:
+        if isinstance(selected, str):
+            response = api.recommend(selected)
         else:
-            return "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iNTAwIiBoZWlnaHQ9Ijc1MCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj4KICA8cmVjdCB3aWR0aD0iNTAwIiBoZWlnaHQ9Ijc1MCIgZmlsbD0iIzMzMzMzMyIvPgogIDx0ZXh0IHg9IjUwJSIgeT0iNTAlIiBmb250LWZhbWlseT0iQXJpYWwsIHNhbnMtc2VyaWYiIGZvbnQtc2l6ZT0iMjQiIGZpbGw9IndoaXRlIiB0ZXh0LWFuY2hvcj0ibWlkZGxlIiBkeT0iLjNlbSI+Tm8gSW1hZ2UgQXZhaWxhYmxlPC90ZXh0Pgo8L3N2Zz4="
-    except (requests.RequestException, KeyError, ValueError, requests.exceptions.ConnectionError):
-        return "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iNTAwIiBoZWlnaHQ9Ijc1MCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj4KICA8cmVjdCB3aWR0aD0iNTAwIiBoZWlnaHQ9Ijc1MCIgZmlsbD0iIzMzMzMzMyIvPgogIDx0ZXh0IHg9IjUwJSIgeT0iNTAlIiBmb250LWZhbWlseT0iQXJpYWwsIHNhbnMtc2VyaWYiIGZvbnQtc2l6ZT0iMjQiIGZpbGw9IndoaXRlIiB0ZXh0LWFuY2hvcj0ibWlkZGxlIiBkeT0iLjNlbSI+Tm8gSW1hZ2UgQXZhaWxhYmxlPC90ZXh0Pgo8L3N2Zz4="
+            response = api.recommend_multi(selected, weights)
+        return (response['recommendations'], True) if response else (None, False)
 
+    cached = recommender.cache.get(cache_key(selected, weights))
+    if cached is not None:
+        return cached, True
 
-def fetch_movie_details(movie_id):
-    """Fetch additional movie details from TMDB API"""
-    try:
-        response = requests.get(
-            f"https://api.themoviedb.org/3/movie/{movie_id}?api_key=75b3c80c1a67275c04868a92f6f50a4b",
-            timeout=10
-        )
-        response.raise_for_status()  # Raise an exception for bad status codes
-        data = response.json()
-        return {
-            "rating": data.get("vote_average", "N/A"),
-            "release_date": data.get("release_date", "N/A"),
-            "overview": data.get("overview", "No overview available")[:150] + "..." if data.get("overview") else "No overview available",
-            "runtime": data.get("runtime", "N/A")
-        }
-    except (requests.RequestException, KeyError, ValueError, requests.exceptions.ConnectionError) as e:
-        # Fallback for offline mode or API issues
-        return {
-            "rating": "N/A",
-            "release_date": "N/A", 
-            "overview": "Details unavailable (offline mode)",
-            "runtime": "N/A"
-        }
-
-
-def recommend(movie):
-    """Generate movie recommendations"""
-    try:
-        movie_index = movies[movies["title"] == movie].index[0]
-        distances = similarity[movie_index]
-        movies_list = sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:6]
+    seeds = [selected] if isinstance(selected, str) else list(selected)
+    result = recommender.recommend_multi(seeds, weights=weights, n=5)
+    if result['not_found'] or not result['recommendations']:
+        return None, False
+    return result['recommendations'], False
 
-        recommended_movies = []
-        recommended_movies_posters = []
-        movie_details = []
-        
-        for i in movies_list:
-            movie_id = movies.iloc[i[0]].movie_id
-            movie_title = movies.iloc[i[0]].title
-            recommended_movies.append(movie_title)
-            poster_url = fetch_poster(movie_id)
-            recommended_movies_posters.append(poster_url)
-            details = fetch_movie_details(movie_id)
-            movie_details.append(details)
-            
-        return recommended_movies, recommended_movies_posters, movie_details
-    except IndexError:
-        return ["Movie not found. Please try again."], [], []
+
+def search_titles(term):
+    """Up to 100 titles matching the search term, best first"""
+    if api is not None:
+        return api.search(term, limit=100)
+    rows, _ = recommender.title_index.search(term, limit=100)
+    return movies["title"].iloc[rows].values
+
+
+def cache_key(selected, weights):
+    seeds = (selected,) if isinstance(selected, str) else tuple(selected)
+    return 'ui', seeds, None if weights is None else tuple(weights)
+
+
+def fetch_metadata(recommendations, on_arrival):
+    """Add poster and details to the recommendations, calling on_arrival(index) as each lands
+
+    All lookups run concurrently within a 10 s deadline; movies still missing
+    then are shown as unavailable. Returns True when some lookups missed it.
+    """
+    positions = {}
+    for idx, recommendation in enumerate(recommendations):
+        positions.setdefault(recommendation['movie_id'], []).append(idx)
+
+    metadata_by_id = {}
+    for movie_id, metadata in tmdb.iter_movies(positions, deadline=10):
+        metadata_by_id[movie_id] = metadata
+        for idx in positions[movie_id]:
+            apply_metadata([recommendations[idx]], metadata_by_id, **DETAILS_OPTIONS)
+            on_arrival(idx)
+
+    late = [idx for movie_id, indices in positions.items() if movie_id not in metadata_by_id for idx in indices]
+    for idx in late:
+        apply_metadata([recommendations[idx]], metadata_by_id, **DETAILS_OPTIONS)
+        on_arrival(idx)
+    return bool(late)
 
 
-# Load movie data and similarity matrix
-@st.cache_data
+def remember(selected, weights, recommendations, partial):
+    """Cache complete recommendations for every session
+
+    Results still missing metadata are not cached; ones with failed lookups only
+    for as long as the TMDB client remembers the failures.
+    """
+    if partial:
+        return
+    failed = any(tmdb.cache.get(r['movie_id'], count=False) is None for r in recommendations)
+    recommender.cache.set(cache_key(selected, weights), recommendations, ttl=tmdb.failure_ttl if failed else None)
+
+
+def show_metadata(slot, recommendation):
+    """Fill a movie card's placeholder with its poster and details"""
+    with slot.container():
+        st.image(recommendation['poster_url'] or NO_POSTER, use_container_width=True)
+        st.markdown(f"⭐ **Rating:** {recommendation['rating']}")
+        release_date = recommendation['release_date']
+        st.markdown(f"📅 **Year:** {release_date[:4] if release_date != 'N/A' else 'N/A'}")
+        if recommendation['runtime'] != 'N/A':
+            st.markdown(f"⏱️ **Runtime:** {recommendation['runtime']} min")
+
+
+# Load movie data, neighbor index and title search index once per server process:
+# a cache_resource singleton is shared by every session as is, never copied
+@st.cache_resource
 def load_data():
     try:
-        movie_dict = pickle.load(open("movie_dict.pkl", "rb"))
-        movies_df = pd.DataFrame(movie_dict)
-        
-        # Check if similarity.pkl exists, if not create a placeholder
-        if os.path.exists("similarity.pkl"):
-            similarity_matrix = pickle.load(open("similarity.pkl", "rb"))
-        else:
-            st.warning("⚠️ similarity.pkl not found. Please run the notebook to generate the similarity matrix.")
-            similarity_matrix = None
-            
-        return movies_df, similarity_matrix
+        # Memory-mapped artifacts when built, otherwise the pickle files
+        movies_df, neighbors = load_model()
+        recommender = Recommender(movies_df, neighbors, SearchIndex(movies_df["title"]),
+                                  cache_size=RECOMMEND_CACHE_SIZE, cache_ttl=RECOMMEND_CACHE_TTL)
+        return movies_df, recommender
     except FileNotFoundError as e:
         st.error(f"❌ Required files not found: {e}")
-        st.info("Please make sure you have run the Jupyter notebook to generate the required pickle files.")
+        st.info("Please make sure you have run the Jupyter notebook and build_index.py to generate the model files.")
         return None, None
 
 
-# Load data
-movies, similarity = load_data()
+# Load data: with RECOMMENDER_API_URL set, the API serves the model and this app only renders
+api = get_api_client()
+if api is not None:
+    movies = recommender = tmdb = None
+    try:
+        titles = api.titles()
+    except APIError as e:
+        st.error(f"❌ Recommendation API unavailable: {e}")
+        titles = None
+else:
+    movies, recommender = load_data()
+    tmdb = get_tmdb_client()
+    titles = movies["title"].values if movies is not None else None
+health_probe = get_health_probe()
+
+if titles is not None:
 
-if movies is not None and similarity is not None:
     # Main header
     st.markdown('<h1 class="main-header">🎬 Movie Recommender System</h1>', unsafe_allow_html=True)
     st.markdown('<p class="subtitle">Discover your next favorite movie using Machine Learning!</p>', unsafe_allow_html=True)
@@ -189,18 +239,23 @@ if movies is not None and similarity is not None:
         st.markdown(f"""
         <div class="stats-container">
             <div class="stat-item">
-                <h3>{len(movies)}</h3>
+                <h3>{len(titles)}</h3>
                 <p>Movies Available</p>
             </div>
         </div>
         """, unsafe_allow_html=True)
         
-        # Connection status
-        is_online = check_internet_connection()
-        status_color = "🟢" if is_online else "🔴"
-        status_text = "Online" if is_online else "Offline"
-        st.markdown(f"**Connection Status:** {status_color} {status_text}")
-        if not is_online:
+        # Connection status, as last seen by the background probe
+        is_online = health_probe.online
+        if is_online is None:
+            st.markdown("**Connection Status:** 🟡 Checking...")
+        else:
+            status_color = "🟢" if is_online else "🔴"
+            status_text = "Online" if is_online else "Offline"
+            st.markdown(f"**Connection Status:** {status_color} {status_text}")
+        if is_online is False and api is not None:
+            st.warning("⚠️ The recommendation API is not reachable. Recommendations may fail.")
+        elif is_online is False:
             st.warning("⚠️ Working in offline mode. Movie posters and details may not be available.")
         
         st.header("ℹ️ About")
@@ -229,65 +284,84 @@ if movies is not None and similarity is not None:
     with col2:
         st.subheader("🔍 Select a Movie")
         
-        # Search functionality
-        search_term = st.text_input("🔍 Search for a movie:", placeholder="Type movie name...")
+        mode = st.radio("Recommend from:", ["One movie", "Several favorites"], horizontal=True)
         
-        if search_term:
-            filtered_movies = movies[movies["title"].str.contains(search_term, case=False, na=False)]["title"].values
-            if len(filtered_movies) > 0:
-                selected_movie_name = st.selectbox("Select from search results:", filtered_movies)
+        if mode == "One movie":
+            # Search functionality
+            search_term = st.text_input("🔍 Search for a movie:", placeholder="Type movie name...")
+            
+            if search_term:
+                try:
+                    filtered_movies = search_titles(search_term)
+                except APIError as e:
+                    st.warning(f"⚠️ Search unavailable: {e}")
+                    filtered_movies = []
+                if len(filtered_movies) > 0:
+                    selected_movie_name = st.selectbox("Select from search results:", filtered_movies)
+                else:
+                    st.warning("No movies found matching your search.")
+                    selected_movie_name = st.selectbox("Or select from all movies:", titles)
             else:
-                st.warning("No movies found matching your search.")
-                selected_movie_name = st.selectbox("Or select from all movies:", movies["title"].values)
+                selected_movie_name = st.selectbox("Select a movie:", titles)
+            selected_weights = None
         else:
-            selected_movie_name = st.selectbox("Select a movie:", movies["title"].values)
+            selected_movie_name = st.multiselect("Pick your favorite movies:", titles)
+            # Optional weights: how much each favorite should count
+            selected_weights = [
+                st.slider(f"Weight of {title}", 0.0, 1.0, 1.0, 0.1, key=f"weight-{title}")
+                for title in selected_movie_name
+            ]
         
         # Recommendation button with animation
-        if st.button("🎬 Get Recommendations", type="primary", use_container_width=True):
+        if st.button("🎬 Get Recommendations", type="primary", use_container_width=True,
+                     disabled=not selected_movie_name or (selected_weights is not None and not any(selected_weights))):
             with st.spinner("🔄 Finding amazing movies for you..."):
-                time.sleep(1)  # Add a small delay for better UX
-                names, posters, details = recommend(selected_movie_name)
-
-                if posters and len(posters) > 0:  # If posters list is not empty
-                    st.markdown('<div class="recommendation-header">🎯 Recommended Movies for You</div>', unsafe_allow_html=True)
-                    
-                    # Display recommendations in a more attractive format
-                    cols = st.columns(5)
-                    for idx, col in enumerate(cols):
-                        with col:
-                            st.markdown(f'<div class="movie-card">', unsafe_allow_html=True)
-                            st.markdown(f'<div class="movie-title">{names[idx]}</div>', unsafe_allow_html=True)
-                            st.image(posters[idx], use_container_width=True)
-                            
-                            # Add movie details
-                            if idx < len(details):
-                                detail = details[idx]
-                                st.markdown(f"⭐ **Rating:** {detail['rating']}")
-                                st.markdown(f"📅 **Year:** {detail['release_date'][:4] if detail['release_date'] != 'N/A' else 'N/A'}")
-                                if detail['runtime'] != 'N/A':
-                                    st.markdown(f"⏱️ **Runtime:** {detail['runtime']} min")
-                            
-                            st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    # Add success message
-                    st.success("✅ Recommendations generated successfully!")
-                    
-                    # Add feedback section
-                    st.markdown("---")
-                    col1, col2, col3 = st.columns(3)
-                    with col2:
-                        st.markdown("**How did we do?**")
-                        feedback = st.radio(
-                            "Rate our recommendations:",
-                            ["😍 Excellent", "😊 Good", "😐 Okay", "😞 Poor"],
-                            horizontal=True
-                        )
-                        if feedback:
-                            st.balloons()
-                            st.success("Thank you for your feedback!")
-                            
-                else:
-                    st.error("❌ " + names[0] if names else "❌ Error generating recommendations")
+                try:
+                    recommendations, complete = recommend(selected_movie_name, selected_weights)
+                    message = "Movie not found. Please try again."
+                except APIError as e:
+                    recommendations, message = None, f"Recommendation API unavailable: {e}"
+
+            if recommendations:
+                st.markdown('<div class="recommendation-header">🎯 Recommended Movies for You</div>', unsafe_allow_html=True)
+
+                # Titles first; posters and details fill in as their lookups land
+                slots = []
+                for recommendation, col in zip(recommendations, st.columns(5)):
+                    with col:
+                        st.markdown(f'<div class="movie-card">', unsafe_allow_html=True)
+                        st.markdown(f'<div class="movie-title">{recommendation["title"]}</div>', unsafe_allow_html=True)
+                        slot = st.empty()
+                        if complete:
+                            show_metadata(slot, recommendation)
+                        else:
+                            slot.caption("⏳ Loading poster and details...")
+                        slots.append(slot)
+                        st.markdown('</div>', unsafe_allow_html=True)
+
+                if not complete:
+                    partial = fetch_metadata(recommendations, lambda idx: show_metadata(slots[idx], recommendations[idx]))
+                    remember(selected_movie_name, selected_weights, recommendations, partial)
+
+                # Add success message
+                st.success("✅ Recommendations generated successfully!")
+
+                # Add feedback section
+                st.markdown("---")
+                col1, col2, col3 = st.columns(3)
+                with col2:
+                    st.markdown("**How did we do?**")
+                    feedback = st.radio(
+                        "Rate our recommendations:",
+                        ["😍 Excellent", "😊 Good", "😐 Okay", "😞 Poor"],
+                        horizontal=True
+                    )
+                    if feedback:
+                        st.balloons()
+                        st.success("Thank you for your feedback!")
+
+            else:
+                st.error("❌ " + message)
 
     # Footer
     st.markdown("---")
@@ -300,5 +374,5 @@ if movies is not None and similarity is not None:
         </div>
         """, unsafe_allow_html=True)
 
-else:
+elif api is None:
     st.error("⚠️ Unable to load required data files. Please check that all pickle files are present.")
@@ -0,0 +1,77 @@
+"""
+Client of the recommendation API for UIs that don't load the model themselves
+
+Website.py uses it when RECOMMENDER_API_URL is set, so one API tier sized for
+the model can serve many lightweight Streamlit replicas. Requests go over one
+pooled requests.Session, and complete answers are kept in a TTL + LRU cache so
+popular movies are answered without leaving the process.
+"""
+
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import TTLCache
+
+RECOMMENDER_API_URL = os.environ.get("RECOMMENDER_API_URL")
+
+
+class APIError(Exception):
+    """The recommendation API could not be reached or failed to answer"""
+
+
+class RecommenderAPIClient:
+    """Catalog, search and recommendations from a running flask_api.py / async_api.py"""
+
+    def __init__(self, api_url=RECOMMENDER_API_URL, timeout=15, cache_size=1024, cache_ttl=600, pool_size=20):
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def titles(self):
+        """Every movie title in the served catalog"""
+        return self._request("GET", "/movies", ("movies",))["movies"]
+
+    def search(self, query, limit=20):
+        """Titles matching query, best first"""
+        return self._request("GET", "/search", ("search", query, limit),
+                             params={"q": query, "limit": limit})["movies"]
+
+    def recommend(self, title):
+        """/recommend response for one movie, or None when it is not in the catalog"""
+        return self._request("POST", "/recommend", ("recommend", title), json={"title": title})
+
+    def recommend_multi(self, titles, weights=None):
+        """/recommend/multi response for several favorites, or None when none is in the catalog"""
+        body = {"titles": list(titles)}
+        if weights is not None:
+            body["weights"] = list(weights)
+        key = ("multi", tuple(titles), None if weights is None else tuple(weights))
+        return self._request("POST", "/recommend/multi", key, json=body)
+
+    def _request(self, method, path, key, **kwargs):
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            response = self.session.request(method, self.api_url + path, timeout=self.timeout, **kwargs)
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise APIError(f"{method} {path} failed: {e}") from e
+
+        # Answers still missing metadata are asked for again next time
+        if not data.get("partial"):
+            self.cache.set(key, data)
+        return data
+
+    def close(self):
+        self.session.close()
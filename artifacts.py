@@ -0,0 +1,186 @@
+"""
+Memory-mapped model artifacts
+
+The model is stored as plain .npy arrays plus a small JSON manifest:
+
+    artifacts/
+        manifest.json
+        movie_ids.npy           int64   (N,)
+        titles.npy              unicode (N,)
+        neighbor_indices.npy    int32   (N, K)
+        neighbor_scores.npy     float32 (N, K)
+        vectors_*.npy           optional L2-normalized CSR bag of words (data, indices, indptr)
+
+Arrays are opened with np.load(mmap_mode='r'), so every server process shares
+the same page-cache copy and loading never executes code (allow_pickle=False).
+
+build_index.py writes each build into its own version directory and then
+points artifacts/CURRENT at it:
+
+    artifacts/
+        CURRENT                 -> "20250101120000"
+        20250101120000/
+            manifest.json
+            ...
+"""
+
+import json
+import os
+import pickle
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from neighbors import NeighborIndex, load_neighbor_index, make_backend
+
+ARTIFACTS_DIR = "artifacts"
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+FORMAT_VERSION = 1
+
+# "precomputed" serves the stored top-K lists. The vector backends need
+# artifacts built with --store-vectors: "sparse" computes exact similarities
+# per request, "ivf" searches an approximate clustered index.
+NEIGHBOR_MODE = os.environ.get("NEIGHBOR_MODE", "precomputed")
+
+ARRAY_FILES = {
+    "movie_ids": "movie_ids.npy",
+    "titles": "titles.npy",
+    "neighbor_indices": "neighbor_indices.npy",
+    "neighbor_scores": "neighbor_scores.npy",
+}
+
+VECTOR_FILES = {
+    "vectors_data": "vectors_data.npy",
+    "vectors_indices": "vectors_indices.npy",
+    "vectors_indptr": "vectors_indptr.npy",
+}
+
+
+def new_version():
+    """Version string for a new build (UTC timestamp)"""
+    return datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+
+
+def save_artifacts(path, movie_ids, titles, neighbor_index, version=None, build_info=None, vectors=None):
+    """Write the catalog and neighbor index as .npy files plus manifest.json
+
+    When vectors is given, the L2-normalized sparse feature matrix is stored
+    too so the servers can run in "sparse" mode.
+    """
+    os.makedirs(path, exist_ok=True)
+    files = dict(ARRAY_FILES)
+    arrays = {
+        "movie_ids": np.asarray(movie_ids, dtype=np.int64),
+        "titles": np.asarray(titles, dtype=str),
+        "neighbor_indices": neighbor_index.indices,
+        "neighbor_scores": neighbor_index.scores,
+    }
+    if vectors is not None:
+        vectors = sparse.csr_matrix(normalize(vectors), dtype=np.float32)
+        files.update(VECTOR_FILES)
+        arrays.update({
+            "vectors_data": vectors.data,
+            "vectors_indices": vectors.indices.astype(np.int32),
+            "vectors_indptr": vectors.indptr.astype(np.int64),
+        })
+    for name, array in arrays.items():
+        np.save(os.path.join(path, files[name]), array, allow_pickle=False)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "version": version or new_version(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "count": int(len(arrays["movie_ids"])),
+        "k": int(neighbor_index.k),
+        "files": files,
+        "build": build_info or {},
+    }
+    if vectors is not None:
+        manifest["vectors_shape"] = list(vectors.shape)
+    # Write the manifest last so a half-written directory is never picked up
+    with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def publish_version(root, version):
+    """Atomically point root/CURRENT at the root/<version> directory"""
+    temp_path = os.path.join(root, CURRENT_FILE + ".tmp")
+    with open(temp_path, "w") as f:
+        f.write(version + "\n")
+    os.replace(temp_path, os.path.join(root, CURRENT_FILE))
+
+
+def resolve_artifact_dir(path=ARTIFACTS_DIR):
+    """Directory holding manifest.json, following CURRENT in a versioned root
+
+    Returns None when no artifacts have been built at path.
+    """
+    if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        return path
+    current_path = os.path.join(path, CURRENT_FILE)
+    if os.path.exists(current_path):
+        with open(current_path) as f:
+            return os.path.join(path, f.read().strip())
+    return None
+
+
+def artifact_version(path=ARTIFACTS_DIR):
+    """Version of the artifacts currently published at path, or None"""
+    path = resolve_artifact_dir(path)
+    if path is None:
+        return None
+    try:
+        return read_manifest(path)["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def read_manifest(path):
+    """Read manifest.json from an artifact directory"""
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format: {manifest.get('format_version')}")
+    return manifest
+
+
+def load_artifacts(path=ARTIFACTS_DIR):
+    """Memory-map every array listed in the manifest"""
+    path = resolve_artifact_dir(path)
+    if path is None:
+        raise FileNotFoundError("No model artifacts found, run build_index.py")
+    manifest = read_manifest(path)
+    arrays = {
+        name: np.load(os.path.join(path, filename), mmap_mode="r", allow_pickle=False)
+        for name, filename in manifest["files"].items()
+    }
+    return manifest, arrays
+
+
+def load_model(artifacts_dir=ARTIFACTS_DIR, mode=NEIGHBOR_MODE):
+    """Load the movie catalog and neighbor index used by the servers
+
+    Prefers the memory-mapped artifacts and falls back to the legacy pickle
+    files. Raises FileNotFoundError when neither is available.
+    """
+    if resolve_artifact_dir(artifacts_dir) is not None:
+        manifest, arrays = load_artifacts(artifacts_dir)
+        movies_df = pd.DataFrame({"movie_id": arrays["movie_ids"], "title": arrays["titles"]})
+        if mode == "precomputed":
+            return movies_df, NeighborIndex(arrays["neighbor_indices"], arrays["neighbor_scores"])
+        if "vectors_shape" not in manifest:
+            raise ValueError("Artifacts have no vectors, rebuild with build_index.py --store-vectors")
+        vectors = sparse.csr_matrix(
+            (arrays["vectors_data"], arrays["vectors_indices"], arrays["vectors_indptr"]),
+            shape=tuple(manifest["vectors_shape"]),
+        )
+        return movies_df, make_backend(mode, vectors, normalized=True)
+
+    with open("movie_dict.pkl", "rb") as f:
+        movies_df = pd.DataFrame(pickle.load(f))
+    return movies_df, load_neighbor_index()
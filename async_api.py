@@ -0,0 +1,287 @@
+"""
+Async (ASGI) variant of the Movie Recommendation API
+
+Serves the same routes and responses as flask_api.py with Starlette. TMDB
+lookups are awaited on one pooled async HTTP client instead of blocking a
+worker thread, so a single process can hold hundreds of /recommend requests
+waiting on metadata.
+
+    uvicorn async_api:app --host 0.0.0.0 --port 5000      (or: python async_api.py)
+"""
+
+import contextlib
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import metrics
+from async_tmdb_client import AsyncTMDBClient
+from metadata_store import MetadataStore
+from neighbors import NeighborIndex
+from recommender import apply_metadata
+from reloader import ModelReloader
+from request_log import log_request, setup_logging
+from serving import (ADMIN_TOKEN, METADATA_DEADLINE, MODEL_WATCH_INTERVAL, RECOMMEND_K, batch_payload,
+                     batch_recommendations, cache_recommendation, load_served_model, multi_cache_key,
+                     multi_payload, parse_batch, parse_multi, recommend_payload, recommend_row)
+from timing import StageTimer, timing_requested
+
+# The served model; handlers read models.current once, so a reload never changes
+# the model under a running request
+models = ModelReloader(load_served_model)
+
+# Created on startup, inside the event loop that uses its connection pool
+tmdb = None
+metrics.register_cache('recommend', lambda: models.current.recommender.cache)
+metrics.register_cache('tmdb', lambda: tmdb.cache if tmdb is not None else None)
+
+
+class MetricsMiddleware:
+    """Request metrics and sampled structured logs (see metrics.py and request_log.py)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            # Label by route template, so unknown paths don't create new series
+            route = scope['route'].path if 'route' in scope else 'unmatched'
+            metrics.observe_request(route, scope['method'], status, elapsed)
+            log_request(scope['method'], route, scope['path'], status, elapsed)
+
+
+def error(message, status):
+    return JSONResponse({'error': message}, status_code=status)
+
+
+async def fetch_metadata(recommendations):
+    """Attach posters and details, awaiting TMDB for at most METADATA_DEADLINE seconds"""
+    movie_ids = {recommendation['movie_id'] for recommendation in recommendations}
+    metadata_by_id = await tmdb.get_movies(movie_ids, deadline=METADATA_DEADLINE)
+    return apply_metadata(recommendations, metadata_by_id)
+
+
+async def resolve_title(recommender, title):
+    """Row of a title: the exact lookup runs inline, the O(N) partial-match scan in the thread pool"""
+    rows = recommender.title_index.rows(title)
+    if rows:
+        return rows[0]
+    return await run_in_threadpool(recommender.title_index.resolve, title)
+
+
+async def neighbor_search(recommender, func, *args, **kwargs):
+    """Run func, which searches neighbors, without stalling the event loop
+
+    The precomputed index reads a few stored rows, so it runs inline; the
+    vector backends score the whole catalog and go to the thread pool.
+    """
+    if isinstance(recommender.neighbor_index, NeighborIndex):
+        return func(*args, **kwargs)
+    return await run_in_threadpool(func, *args, **kwargs)
+
+
+async def json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def health(request):
+    """Health check endpoint"""
+    return JSONResponse({'status': 'healthy', 'message': 'Movie Recommendation API is running!'})
+
+
+async def cache_stats(request):
+    """Size and hit/miss counters of the server-side caches"""
+    return JSONResponse({
+        'recommend': models.current.recommender.cache.stats(),
+        'tmdb': tmdb.cache.stats()
+    })
+
+
+async def get_metrics(request):
+    """Request, cache and TMDB metrics of this process in the Prometheus text format"""
+    return Response(metrics.render(), headers={'Content-Type': metrics.CONTENT_TYPE})
+
+
+async def model_status(request):
+    """Artifact version being served and the state of the last reload"""
+    return JSONResponse(models.status())
+
+
+async def reload_model(request):
+    """Load the published artifact version in the background and swap it in when ready"""
+    if not ADMIN_TOKEN:
+        return error('Reloading is disabled, set ADMIN_TOKEN to enable it', 404)
+    if request.headers.get('Authorization') != f'Bearer {ADMIN_TOKEN}':
+        return error('Unauthorized', 401)
+    started = await run_in_threadpool(models.reload, wait=request.query_params.get('wait') == '1')
+    status = models.status()
+    status['started'] = started
+    return JSONResponse(status, status_code=202 if started else 409)
+
+
+async def get_movies(request):
+    """Get all available movies (optionally paginated by cursor, with field selection)"""
+    try:
+        precomputed = models.current.movies_response_for(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+    status, body, headers = precomputed.negotiate(request.headers.get('Accept-Encoding', ''),
+                                                  request.headers.get('If-None-Match', ''))
+    return Response(body, status_code=status, headers=headers,
+                    media_type='application/json' if status == 200 else None)
+
+
+async def search_movies(request):
+    """Search movies by title (prefix and typo tolerant, ranked, paginated)"""
+    try:
+        return JSONResponse(models.current.search(request.query_params))
+    except ValueError as e:
+        return error(str(e), 400)
+
+
+async def recommend(request):
+    """Get movie recommendations"""
+    # Time of each stage, sent back in Server-Timing on request (see timing.py)
+    timer = StageTimer('/recommend')
+    data = await json_body(request)
+    movie_title = data.get('title') if isinstance(data, dict) else None
+    if movie_title is None or movie_title == "":
+        return error('Movie title is required', 400)
+
+    # The whole request is answered from the model that was current when it started
+    recommender = models.current.recommender
+
+    # Find movie in database: exact title first, then first partial match
+    with timer.stage('resolve'):
+        movie_index = await resolve_title(recommender, movie_title)
+    if movie_index is None:
+        return error(f'Movie "{movie_title}" not found', 404)
+
+    # Popular titles are answered from the response cache of the loaded model
+    cache_key = (movie_index, RECOMMEND_K, True)
+    with timer.stage('cache'):
+        response = recommender.cache.get(cache_key)
+    if response is None:
+        result = await neighbor_search(recommender, recommend_row, recommender, movie_index, timer)
+        with timer.stage('enrich'):
+            partial = await fetch_metadata(result['recommendations'])
+        response = recommend_payload(result, partial)
+        cache_recommendation(recommender, cache_key, response, tmdb)
+    with timer.stage('serialize'):
+        http_response = JSONResponse(response)
+    server_timing = timer.finish()
+    if timing_requested(request.headers):
+        http_response.headers['Server-Timing'] = server_timing
+    return http_response
+
+
+async def recommend_multi(request):
+    """Get recommendations for several (optionally weighted) favorite movies together"""
+    try:
+        titles, weights = parse_multi(await json_body(request))
+    except ValueError as e:
+        return error(str(e), 400)
+
+    recommender = models.current.recommender
+    cache_key = multi_cache_key(titles, weights)
+    response = recommender.cache.get(cache_key)
+    if response is None:
+        result = await neighbor_search(recommender, recommender.recommend_multi, titles,
+                                       weights=weights, n=RECOMMEND_K)
+        if not result['input_movies']:
+            return JSONResponse({'error': 'None of the movies were found', 'not_found': result['not_found']},
+                                status_code=404)
+        partial = await fetch_metadata(result['recommendations'])
+        response = multi_payload(result, partial)
+        cache_recommendation(recommender, cache_key, response, tmdb)
+    return JSONResponse(response)
+
+
+async def recommend_batch(request):
+    """Get recommendations for many movies (titles and/or movie IDs) in one call"""
+    try:
+        seeds, k, partial_titles, with_metadata = parse_batch(await json_body(request))
+        # Large batches are CPU work; keep the event loop free for other requests
+        results = await run_in_threadpool(models.current.recommender.recommend_batch,
+                                          seeds, n=k, partial=partial_titles)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    partial = False
+    if with_metadata:
+        partial = await fetch_metadata(batch_recommendations(results))
+    return JSONResponse(batch_payload(results, partial))
+
+
+async def internal_error(request, exc):
+    return error(f'Internal server error: {exc}', 500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global tmdb
+    # Shared pooled, cached TMDB client, reading the on-disk metadata store first
+    tmdb = AsyncTMDBClient(timeout=5, store=MetadataStore())
+    setup_logging()
+    if MODEL_WATCH_INTERVAL > 0:
+        models.watch(MODEL_WATCH_INTERVAL)
+    yield
+    await tmdb.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health, methods=['GET']),
+        Route('/cache/stats', cache_stats, methods=['GET']),
+        Route('/metrics', get_metrics, methods=['GET']),
+        Route('/admin/model', model_status, methods=['GET']),
+        Route('/admin/reload', reload_model, methods=['POST']),
+        Route('/movies', get_movies, methods=['GET']),
+        Route('/search', search_movies, methods=['GET']),
+        Route('/recommend', recommend, methods=['POST']),
+        Route('/recommend/multi', recommend_multi, methods=['POST']),
+        Route('/recommend/batch', recommend_batch, methods=['POST']),
+    ],
+    middleware=[
+        # Enable CORS for Flutter app
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['GET', 'POST', 'OPTIONS'],
+                   allow_headers=['Content-Type', 'Authorization', 'X-Server-Timing'],
+                   expose_headers=['Server-Timing']),
+        Middleware(MetricsMiddleware),
+    ],
+    exception_handlers={Exception: internal_error},
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("🎬 Starting Movie Recommendation API (async)...")
+    print(f"📊 Loaded {len(models.current.movies_df)} movies (version {models.version})")
+    print("🚀 Server running on http://localhost:5000")
+    uvicorn.run(app, host='0.0.0.0', port=5000, timeout_keep_alive=int(os.environ.get("API_KEEPALIVE", 5)))
@@ -0,0 +1,109 @@
+"""
+asyncio TMDB metadata client for the async API
+
+Same cache, store and deadline semantics as TMDBClient, but lookups are
+coroutines over one pooled httpx.AsyncClient, so a single process can wait
+on hundreds of TMDB responses without a thread per request. Concurrent
+requests for the same movie share one in-flight fetch.
+
+The connections are split over several small httpx pools (by movie ID):
+httpcore scans every connection of a pool for each request, so one pool of
+hundreds of connections spends more time on bookkeeping than on I/O.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from cache import TTLCache
+from metrics import observe_tmdb
+from tmdb_client import TMDB_API_KEY, TMDB_API_URL, parse_movie
+
+
+class AsyncTMDBClient:
+    """Fetches and caches movie metadata from the TMDB API without blocking the event loop"""
+
+    def __init__(self, api_url=TMDB_API_URL, api_key=TMDB_API_KEY, timeout=5,
+                 cache_size=4096, cache_ttl=24 * 3600, failure_ttl=60, max_connections=100,
+                 pool_size=10, store=None):
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.store = store
+        self.failure_ttl = failure_ttl
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        # max_connections bounds the TMDB connections shared by all requests
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.pools = [httpx.AsyncClient(timeout=timeout, limits=limits)
+                      for _ in range(max(max_connections // pool_size, 1))]
+        self._in_flight = {}
+
+    async def get_movie(self, movie_id):
+        """Metadata for one movie, or None when TMDB is unavailable"""
+        return (await self.get_movies([movie_id])).get(int(movie_id))
+
+    async def fetch(self, movie_id):
+        """Request one movie from TMDB, bypassing the caches, and cache the result"""
+        movie_id = int(movie_id)
+        start = time.perf_counter()
+        try:
+            http = self.pools[movie_id % len(self.pools)]
+            response = await http.get(f"{self.api_url}/movie/{movie_id}", params={"api_key": self.api_key})
+            response.raise_for_status()
+            movie = parse_movie(response.json())
+        except (httpx.HTTPError, ValueError):
+            observe_tmdb(False, time.perf_counter() - start)
+            # Remember failures briefly so an outage doesn't cost a timeout per call
+            self.cache.set(movie_id, None, ttl=self.failure_ttl)
+            return None
+
+        observe_tmdb(True, time.perf_counter() - start)
+        self.cache.set(movie_id, movie)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.put, movie_id, movie)
+        return movie
+
+    def _fetch_task(self, movie_id):
+        """The running fetch of movie_id, started when there is none"""
+        task = self._in_flight.get(movie_id)
+        if task is None:
+            task = asyncio.ensure_future(self.fetch(movie_id))
+            self._in_flight[movie_id] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(movie_id, None))
+        return task
+
+    async def get_movies(self, movie_ids, deadline=None):
+        """Metadata for several movies, fetched concurrently
+
+        Returns a dict of movie_id -> metadata (None when TMDB failed). Movies
+        whose lookup is still running after deadline seconds are left out;
+        those lookups finish in the background and fill the cache for the
+        next request.
+        """
+        results = {}
+        misses = []
+        for movie_id in dict.fromkeys(int(movie_id) for movie_id in movie_ids):
+            cached = self.cache.get(movie_id, _MISSING)
+            if cached is not _MISSING:
+                results[movie_id] = cached
+            else:
+                misses.append(movie_id)
+
+        if misses and self.store is not None:
+            for movie_id, stored in (await asyncio.to_thread(self.store.get_many, misses)).items():
+                self.cache.set(movie_id, stored)
+                results[movie_id] = stored
+            misses = [movie_id for movie_id in misses if movie_id not in results]
+
+        pending = {self._fetch_task(movie_id): movie_id for movie_id in misses}
+        if pending:
+            done, _ = await asyncio.wait(pending, timeout=deadline)
+            for task in done:
+                results[pending[task]] = task.result()
+        return results
+
+    async def close(self):
+        await asyncio.gather(*(http.aclose() for http in self.pools))
+
+
+_MISSING = object()
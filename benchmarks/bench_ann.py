@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Recall@5 versus latency of the approximate IVF backend against the exact
+sparse brute-force backend on a synthetic bag-of-words catalog
+
+Usage (from the project root):
+    python -m benchmarks.bench_ann [--movies 100000] [--probes 1 4 8 16] [--queries 200]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+
+from neighbors import IVFIndex, SparseCosineIndex
+
+
+def synthetic_vectors(n_movies, n_features=5000, n_topics=200, words_per_movie=40, seed=0):
+    """Bag-of-words vectors where each movie mostly draws words from one topic"""
+    rng = np.random.default_rng(seed)
+    topic_words = rng.integers(0, n_features, size=(n_topics, 100))
+    topics = rng.integers(0, n_topics, size=n_movies)
+    on_topic = rng.random((n_movies, words_per_movie)) < 0.7
+    columns = np.where(
+        on_topic,
+        topic_words[topics[:, None], rng.integers(0, 100, size=(n_movies, words_per_movie))],
+        rng.integers(0, n_features, size=(n_movies, words_per_movie)),
+    )
+    rows = np.repeat(np.arange(n_movies), words_per_movie)
+    data = np.ones(rows.shape, dtype=np.float32)
+    return sparse.csr_matrix((data, (rows, columns.ravel())), shape=(n_movies, n_features))
+
+
+def run_queries(index, queries, k):
+    """Results and median latency in milliseconds"""
+    results, timings = [], []
+    for movie_index in queries:
+        start = time.perf_counter()
+        indices, _ = index.neighbors(movie_index, k)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(set(int(i) for i in indices))
+    return results, float(np.median(timings))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark approximate neighbor search")
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    vectors = synthetic_vectors(args.movies)
+    queries = np.random.default_rng(1).choice(args.movies, args.queries, replace=False)
+
+    exact = SparseCosineIndex(vectors)
+    truth, exact_ms = run_queries(exact, queries, args.k)
+    print(f"🎬 {args.movies} movies, {args.queries} queries, k={args.k}")
+    print(f"{'backend':<18} {'recall@' + str(args.k):>9} {'median (ms)':>12}")
+    print(f"{'exact (sparse)':<18} {1.0:>9.3f} {exact_ms:>12.3f}")
+
+    start = time.perf_counter()
+    ivf = IVFIndex(vectors)
+    print(f"   IVF build: {ivf.n_lists} lists in {time.perf_counter() - start:.1f}s")
+    for n_probe in args.probes:
+        ivf.n_probe = min(n_probe, ivf.n_lists)
+        found, ivf_ms = run_queries(ivf, queries, args.k)
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        print(f"{'ivf n_probe=' + str(n_probe):<18} {recall:>9.3f} {ivf_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput of the API endpoints under load, with TMDB replaced
+by a local stub (benchmarks/tmdb_stub.py) with injectable latency
+
+Targets:
+    inprocess  the Flask app in this process (test client, no sockets)
+    gunicorn   `gunicorn -c gunicorn.conf.py wsgi:app` started on a free port
+    async      `uvicorn async_api:app` started on a free port
+    --url      an already running server (TMDB and RSS are then not controlled)
+
+Titles follow a Zipf popularity distribution (--zipf), so popular movies are
+requested far more often than the long tail, as in real traffic, and the
+response and metadata caches see a realistic hit rate. /search queries are
+prefixes of those titles, /recommend/batch sends --batch-size titles.
+
+For every endpoint and concurrency level the run reports p50/p95/p99
+latency, requests/s, errors and the RSS of the server process(es), and
+writes everything to a JSON file (tagged with the git commit) that --compare
+diffs against an earlier run.
+
+Usage (from the project root, with the model artifacts built):
+    python -m benchmarks.bench_api [--target inprocess|gunicorn|async] [--endpoints recommend search]
+                                   [--concurrency 1 8 32] [--duration 10] [--tmdb-latency 0.05]
+                                   [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import bisect
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.load_test import free_port, wait_ready
+from benchmarks.tmdb_stub import TMDBStub
+
+ENDPOINTS = ("health", "movies", "search", "recommend", "batch")
+
+
+class Workload:
+    """Requests for each endpoint, with titles drawn from a Zipf popularity distribution"""
+
+    def __init__(self, titles, exponent=1.1, batch_size=10, seed=0):
+        rng = np.random.default_rng(seed)
+        # Popularity rank of every title is random, its weight falls off as 1 / rank^exponent
+        self.titles = [titles[i] for i in rng.permutation(len(titles))]
+        weights = 1.0 / np.arange(1, len(titles) + 1) ** exponent
+        self.cdf = np.cumsum(weights / weights.sum()).tolist()
+        self.batch_size = batch_size
+
+    def title(self, rng):
+        return self.titles[min(bisect.bisect(self.cdf, rng.random()), len(self.titles) - 1)]
+
+    def request(self, endpoint, rng):
+        """(method, path, query params, JSON body) of one request"""
+        if endpoint == "health":
+            return "GET", "/health", None, None
+        if endpoint == "movies":
+            return "GET", "/movies", None, None
+        if endpoint == "search":
+            title = self.title(rng)
+            return "GET", "/search", {"q": title[:rng.randint(2, 6)]}, None
+        if endpoint == "recommend":
+            return "POST", "/recommend", None, {"title": self.title(rng)}
+        return "POST", "/recommend/batch", None, {"titles": [self.title(rng) for _ in range(self.batch_size)],
+                                                   "enrich": True}
+
+
+class InProcessTarget:
+    """The Flask app loaded in this process, driven through its test client"""
+
+    name = "inprocess"
+
+    def __init__(self, env):
+        # TMDB URL and metadata store are read when the modules are imported
+        os.environ.update(env)
+        import flask_api
+        flask_api.init_worker()
+        self.app = flask_api.app
+        self.titles = flask_api.models.current.movies_df["title"].tolist()
+        self.pid = os.getpid()
+
+    def sender(self):
+        client = self.app.test_client()
+
+        def send(method, path, params, body):
+            response = client.open(path, method=method, query_string=params, json=body,
+                                   headers={"Accept-Encoding": "gzip"})
+            response.get_data()
+            return response.status_code
+
+        return send
+
+    def close(self):
+        pass
+
+
+class HTTPTarget:
+    """A server reached over HTTP, optionally started (and stopped) by the benchmark"""
+
+    def __init__(self, name, base_url, process=None):
+        import requests
+        self.name = name
+        self.base_url = base_url
+        self.process = process
+        self.pid = process.pid if process else None
+        wait_ready(base_url)
+        self.titles = requests.get(f"{base_url}/movies", timeout=30).json()["movies"]
+
+    @classmethod
+    def start(cls, name, env, workers):
+        port = free_port()
+        env = dict(os.environ, **env, API_BIND=f"127.0.0.1:{port}", API_WORKERS=str(workers))
+        if name == "gunicorn":
+            command = ["gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"]
+        else:
+            command = [sys.executable, "-m", "uvicorn", "async_api:app", "--host", "127.0.0.1",
+                       "--port", str(port), "--log-level", "warning"]
+        process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            return cls(name, f"http://127.0.0.1:{port}", process)
+        except BaseException:
+            process.terminate()
+            raise
+
+    def sender(self):
+        import requests
+        session = requests.Session()
+
+        def send(method, path, params, body):
+            response = session.request(method, self.base_url + path, params=params, json=body, timeout=60)
+            return response.status_code
+
+        return send
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+
+def rss_mb(pid):
+    """Resident memory of pid and all its descendants in MB (Linux /proc), None elsewhere"""
+    if pid is None or not os.path.exists(f"/proc/{pid}"):
+        return None
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total_kb += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total_kb / 1024
+
+
+def drive(target, workload, endpoint, concurrency, duration, seed):
+    """Run concurrency closed-loop clients for duration seconds; latencies (s) and error count"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def loop(thread_seed):
+        rng = random.Random(thread_seed)
+        send = target.sender()
+        local_latencies, local_errors = [], 0
+        while time.monotonic() < stop_at:
+            request = workload.request(endpoint, rng)
+            start = time.perf_counter()
+            try:
+                ok = send(*request) < 400
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            if ok:
+                local_latencies.append(elapsed)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=loop, args=(seed * 10000 + i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), errors[0]
+
+
+def measure(target, workload, endpoint, concurrency, args):
+    # Warm-up: connections, lazily built pages and the caches of popular titles
+    drive(target, workload, endpoint, concurrency, args.warmup, seed=0)
+    latencies, errors = drive(target, workload, endpoint, concurrency, args.duration, seed=1)
+
+    def percentile(q):
+        return float(np.percentile(latencies, q) * 1000) if len(latencies) else None
+
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": int(len(latencies)),
+        "errors": errors,
+        "rps": len(latencies) / args.duration,
+        "mean_ms": float(latencies.mean() * 1000) if len(latencies) else None,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "rss_mb": rss_mb(target.pid),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print the change of p50, p99 and req/s against an earlier result file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(row["endpoint"], row["concurrency"]): row for row in baseline["results"]}
+    print(f"\n📊 Compared with {baseline_path} (commit {baseline.get('commit')})")
+    print(f"{'endpoint':<10} {'conc':>5} {'p50':>9} {'p99':>9} {'req/s':>9}")
+
+    def change(new, old):
+        if new is None or not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    for row in results:
+        old = previous.get((row["endpoint"], row["concurrency"]))
+        if old is None:
+            continue
+        print(f"{row['endpoint']:<10} {row['concurrency']:>5} {change(row['p50_ms'], old['p50_ms']):>9} "
+              f"{change(row['p99_ms'], old['p99_ms']):>9} {change(row['rps'], old['rps']):>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints with a stubbed TMDB")
+    parser.add_argument("--target", choices=["inprocess", "gunicorn", "async"], default="inprocess")
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="gunicorn worker processes")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds per endpoint and level")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured seconds before each run")
+    parser.add_argument("--tmdb-latency", type=float, default=0.05, help="seconds per stubbed TMDB request")
+    parser.add_argument("--tmdb-jitter", type=float, default=0.02)
+    parser.add_argument("--zipf", type=float, default=1.1, help="exponent of the title popularity distribution")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--output", help="result file (default: bench_api_<target>_<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    args = parser.parse_args(argv)
+
+    stub = TMDBStub(latency=args.tmdb_latency, jitter=args.tmdb_jitter).start()
+    metadata_dir = tempfile.TemporaryDirectory()
+    # Fresh, empty metadata store: every run starts with the same cold TMDB cache
+    env = {"TMDB_API_URL": stub.url, "METADATA_DB": os.path.join(metadata_dir.name, "metadata.db"),
+           "MODEL_WATCH_INTERVAL": "0"}
+
+    target_name = "url" if args.url else args.target
+    if args.url:
+        target = HTTPTarget("url", args.url.rstrip("/"))
+    elif args.target == "inprocess":
+        target = InProcessTarget(env)
+    else:
+        target = HTTPTarget.start(args.target, env, args.workers)
+
+    results = []
+    try:
+        workload = Workload(target.titles, args.zipf, args.batch_size)
+        print(f"🎬 {len(target.titles)} movies, target {target_name}, TMDB stub "
+              f"{args.tmdb_latency * 1000:.0f}+{args.tmdb_jitter * 1000:.0f} ms, zipf {args.zipf}")
+        print(f"{'endpoint':<10} {'conc':>5} {'req/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} "
+              f"{'errors':>7} {'RSS (MB)':>9}")
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                row = measure(target, workload, endpoint, concurrency, args)
+                results.append(row)
+                print(f"{endpoint:<10} {concurrency:>5} {row['rps']:>9.1f} {_ms(row['p50_ms']):>9} "
+                      f"{_ms(row['p95_ms']):>9} {_ms(row['p99_ms']):>9} {row['errors']:>7} "
+                      f"{_ms(row['rss_mb'], 0):>9}")
+    finally:
+        target.close()
+        stub.stop()
+        metadata_dir.cleanup()
+
+    commit = git_commit()
+    output = args.output or f"bench_api_{target_name}_{commit or 'unknown'}.json"
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "target": target_name,
+            "cpu_count": os.cpu_count(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "results": results,
+        }, f, indent=2)
+    print(f"💾 Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+def _ms(value, digits=2):
+    return "n/a" if value is None else f"{value:.{digits}f}"
+
+
+if __name__ == "__main__":
+    main()
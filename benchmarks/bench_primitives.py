@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks of the model build and recommend primitives on synthetic
+catalogs of growing size, to see which steps scale quadratically before the
+dataset grows
+
+Each primitive is a registered benchmark (like a pytest-benchmark test)
+whose setup runs untimed; the timed call is repeated until --min-time has
+passed (at least --min-rounds times) and reported as min/median/mean/stddev.
+Per-row primitives on catalogs above --max-rows, and all-pairs primitives
+whose full result would not fit in memory, are timed on a sample of rows and
+scaled up to the full catalog; those estimates are marked with "~". The
+scaling exponent between the two largest sizes (time ~ n^exponent) flags
+superlinear steps.
+
+Primitives:
+    parse_json         build_index.parse_json_list over genres/keywords/cast/crew
+    literal_eval       ast.literal_eval over the same columns (the notebook's parser)
+    stem_porter        PorterStemmer().stem on every word, uncached (the notebook)
+    build_tags         build_index.build_tags: parsing + lru-cached stemming
+    vectorize          CountVectorizer(max_features=5000).fit_transform
+    cosine_dense       sklearn cosine_similarity to a dense N x N matrix (the notebook)
+    neighbors_build    build_neighbor_index_from_vectors: blocked top-K, O(block x N) memory
+    topk_sorted        one request: sorted(enumerate(similarity row)) (the original recommend)
+    topk_partition     one request: neighbors.top_k (argpartition)
+    pickle_similarity  pickle.loads of the dense similarity matrix (similarity.pkl)
+    pickle_movies      pickle.loads of the movie dict (movie_dict.pkl)
+    artifacts_load     artifacts.load_artifacts (memory-mapped top-K arrays)
+
+Usage (from the project root):
+    python -m benchmarks.bench_primitives [--sizes 5000 50000 500000] [--only vectorize neighbors_build]
+                                          [--max-rows 50000] [--json primitives.json]
+"""
+
+import argparse
+import ast
+import json
+import math
+import pickle
+import statistics
+import tempfile
+import time
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS = {}
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama", "Family",
+          "Fantasy", "History", "Horror", "Music", "Mystery", "Romance", "Science Fiction", "Thriller",
+          "War", "Western"]
+SYLLABLES = ("ka ri to men sa lo ver tan di mo re nu pa shi gor el an ta ber vin cal dor fi "
+             "lu ham zen mar qu os tri ex ad ul").split()
+SUFFIXES = ("", "", "", "s", "ing", "ed", "er", "ers", "ation", "ly", "ness", "ful", "ies")
+VOCABULARY_SIZE = 30000
+# Largest dense block (values) materialized for the all-pairs samples: 200 MB of float64
+DENSE_BLOCK_VALUES = 25_000_000
+
+
+def benchmark(name):
+    """Register a benchmark; the decorated function receives the Catalog and returns (call, scale)
+
+    call() is the timed code; scale > 1 means call() covers 1/scale of the
+    catalog and its time is multiplied to estimate the full run.
+    """
+    def register(prepare):
+        BENCHMARKS[name] = prepare
+        return prepare
+    return register
+
+
+class Catalog:
+    """Synthetic TMDB-like catalog of n movies; inputs of the primitives are built lazily, untimed"""
+
+    def __init__(self, n, max_rows, dense_max, seed=0):
+        self.n = n
+        self.max_rows = max_rows
+        self.dense_max = dense_max
+        self.rng = np.random.default_rng(seed)
+
+    @cached_property
+    def words(self):
+        """Pseudo-English vocabulary with inflected endings, so stemming does real work"""
+        rng = np.random.default_rng(1)
+        words = set()
+        while len(words) < VOCABULARY_SIZE:
+            syllables = rng.choice(SYLLABLES, size=rng.integers(2, 5))
+            words.add("".join(syllables) + SUFFIXES[rng.integers(len(SUFFIXES))])
+        return np.array(sorted(words))
+
+    def sample_words(self, count):
+        # Zipf-like word frequencies, as in real text
+        ranks = np.minimum(self.rng.zipf(1.3, size=count), len(self.words)) - 1
+        return self.words[ranks]
+
+    def texts(self, rows, low, high, chunk=20000):
+        texts = []
+        for start in range(0, rows, chunk):
+            lengths = self.rng.integers(low, high, size=min(chunk, rows - start))
+            words = self.sample_words(int(lengths.sum()))
+            texts.extend(" ".join(part) for part in np.split(words, np.cumsum(lengths)[:-1]))
+        return texts
+
+    def people(self, rows, count):
+        return [[f"{a.title()} {b.title()}" for a, b in zip(*(self.sample_words(count) for _ in range(2)))]
+                for _ in range(rows)]
+
+    @cached_property
+    def sample_rows(self):
+        """Rows whose per-row primitives are timed (all of them up to max_rows)"""
+        return min(self.n, self.max_rows)
+
+    @cached_property
+    def raw(self):
+        """TMDB CSV columns (JSON-encoded lists) of sample_rows movies"""
+        rows = self.sample_rows
+        genres, keywords, cast, crew = [], [], [], []
+        for cast_names, crew_names in zip(self.people(rows, 8), self.people(rows, 6)):
+            genres.append([{"id": int(i), "name": GENRES[i]}
+                           for i in self.rng.choice(len(GENRES), size=self.rng.integers(1, 4), replace=False)])
+            keywords.append([{"id": int(i), "name": str(word)}
+                             for i, word in enumerate(self.sample_words(int(self.rng.integers(3, 10))))])
+            cast.append([{"cast_id": i, "character": name.split()[0], "credit_id": f"52fe4{i:05d}",
+                          "gender": i % 3, "id": 1000 + i, "name": name, "order": i}
+                         for i, name in enumerate(cast_names)])
+            crew.append([{"credit_id": f"53fe4{i:05d}", "department": "Directing" if i == 0 else "Writing",
+                          "gender": i % 3, "id": 2000 + i, "job": "Director" if i == 0 else "Writer",
+                          "name": name} for i, name in enumerate(crew_names)])
+        return pd.DataFrame({
+            "movie_id": np.arange(rows),
+            "title": self.titles[:rows],
+            "overview": self.texts(rows, 20, 60),
+            "genres": [json.dumps(value) for value in genres],
+            "keywords": [json.dumps(value) for value in keywords],
+            "cast": [json.dumps(value) for value in cast],
+            "crew": [json.dumps(value) for value in crew],
+        })
+
+    @cached_property
+    def raw_literal(self):
+        """The list columns in Python literal syntax, as read by ast.literal_eval in the notebook"""
+        return {column: [repr(json.loads(value)) for value in self.raw[column]]
+                for column in ("genres", "keywords", "cast", "crew")}
+
+    @cached_property
+    def titles(self):
+        return [" ".join(words).title() for words in np.split(self.sample_words(self.n * 3), self.n)]
+
+    @cached_property
+    def tags(self):
+        """Stemmed tag strings of all n movies (overview words + genres, keywords, cast, crew)"""
+        return self.texts(self.n, 30, 70)
+
+    @cached_property
+    def vectors(self):
+        from sklearn.feature_extraction.text import CountVectorizer
+        return CountVectorizer(max_features=5000, stop_words="english").fit_transform(self.tags)
+
+    @cached_property
+    def normalized(self):
+        from sklearn.preprocessing import normalize
+        return normalize(self.vectors)
+
+    def block_rows(self, size=1000):
+        """Rows of the all-pairs sample: the whole catalog when its dense matrix fits, else one block"""
+        return self.n if self.n <= self.dense_max else max(1, min(size, DENSE_BLOCK_VALUES // self.n))
+
+    @cached_property
+    def similarity_rows(self):
+        """Dense similarity rows of the first block_rows() movies"""
+        return (self.normalized[:self.block_rows()] @ self.normalized.T).toarray()
+
+
+def scale_rows(catalog):
+    return catalog.n / catalog.sample_rows
+
+
+@benchmark("parse_json")
+def parse_json(catalog):
+    from build_index import directors, names
+    raw = catalog.raw
+
+    def call():
+        for genres, keywords, cast, crew in zip(raw["genres"], raw["keywords"], raw["cast"], raw["crew"]):
+            names(genres), names(keywords), names(cast, 3), directors(crew)
+
+    return call, scale_rows(catalog)
+
+
+@benchmark("literal_eval")
+def literal_eval(catalog):
+    columns = catalog.raw_literal
+
+    def call():
+        for values in zip(columns["genres"], columns["keywords"], columns["cast"], columns["crew"]):
+            for value in values:
+                ast.literal_eval(value)
+
+    return call, scale_rows(catalog)
+
+
+@benchmark("stem_porter")
+def stem_porter(catalog):
+    from nltk.stem.porter import PorterStemmer
+    stemmer = PorterStemmer()
+    overviews = catalog.raw["overview"].tolist()
+
+    def call():
+        for overview in overviews:
+            " ".join(stemmer.stem(word) for word in overview.lower().split())
+
+    return call, scale_rows(catalog)
+
+
+@benchmark("build_tags")
+def build_tags(catalog):
+    import build_index
+    raw = catalog.raw
+
+    def call():
+        # Every round starts with an empty stem cache, like a fresh build
+        build_index.stem_word.cache_clear()
+        build_index.build_tags(raw)
+
+    return call, scale_rows(catalog)
+
+
+@benchmark("vectorize")
+def vectorize(catalog):
+    from sklearn.feature_extraction.text import CountVectorizer
+    tags = catalog.tags
+
+    def call():
+        CountVectorizer(max_features=5000, stop_words="english").fit_transform(tags)
+
+    return call, 1
+
+
+@benchmark("cosine_dense")
+def cosine_dense(catalog):
+    from sklearn.metrics.pairwise import cosine_similarity
+    vectors = catalog.vectors
+    rows = catalog.block_rows()
+
+    def call():
+        cosine_similarity(vectors[:rows], vectors)
+
+    return call, catalog.n / rows
+
+
+@benchmark("neighbors_build")
+def neighbors_build(catalog):
+    from neighbors import build_neighbor_index_from_vectors, top_k
+    if catalog.n <= catalog.max_rows:
+        vectors = catalog.vectors
+        return (lambda: build_neighbor_index_from_vectors(vectors, k=20)), 1
+
+    # One block of the build loop, scaled to the number of blocks (smaller than the build's
+    # 1024 rows on large catalogs, whose dense block would not fit in memory here)
+    normalized, block_size = catalog.normalized, catalog.block_rows(1024)
+
+    def call():
+        block = (normalized[:block_size] @ normalized.T).toarray()
+        top_k(block, 20, exclude=np.arange(block_size))
+
+    return call, catalog.n / block_size
+
+
+@benchmark("topk_sorted")
+def topk_sorted(catalog):
+    from benchmarks.bench_topk import sorted_top_k
+    row = catalog.similarity_rows[0]
+    return (lambda: sorted_top_k(row, 0)), 1
+
+
+@benchmark("topk_partition")
+def topk_partition(catalog):
+    from neighbors import top_k
+    row = catalog.similarity_rows[0]
+    return (lambda: top_k(row, 5, exclude=0)), 1
+
+
+@benchmark("pickle_similarity")
+def pickle_similarity(catalog):
+    data = pickle.dumps(catalog.similarity_rows, protocol=pickle.HIGHEST_PROTOCOL)
+    return (lambda: pickle.loads(data)), catalog.n / catalog.similarity_rows.shape[0]
+
+
+@benchmark("pickle_movies")
+def pickle_movies(catalog):
+    movies = pd.DataFrame({"movie_id": np.arange(catalog.n), "title": catalog.titles, "tags": catalog.tags})
+    data = pickle.dumps(movies.to_dict())
+    return (lambda: pickle.loads(data)), 1
+
+
+@benchmark("artifacts_load")
+def artifacts_load(catalog):
+    from artifacts import load_artifacts, save_artifacts
+    from neighbors import NeighborIndex
+    rng = np.random.default_rng(0)
+    index = NeighborIndex(rng.integers(0, catalog.n, size=(catalog.n, 20), dtype=np.int32),
+                          rng.random((catalog.n, 20), dtype=np.float32))
+    directory = tempfile.TemporaryDirectory()
+    save_artifacts(directory.name, np.arange(catalog.n), catalog.titles, index)
+
+    def call():
+        directory  # keep the files alive as long as the benchmark
+        load_artifacts(directory.name)
+
+    return call, 1
+
+
+def measure(call, min_rounds, min_time, max_time):
+    """Timings (s) of repeated calls: at least min_rounds and min_time, one call if it exceeds max_time"""
+    timings = []
+    started = time.perf_counter()
+    while True:
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+        if timings[0] >= max_time or (len(timings) >= min_rounds and elapsed >= min_time) or len(timings) >= 1000:
+            return timings
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the build and recommend primitives")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 50000, 500000])
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these primitives")
+    parser.add_argument("--max-rows", type=int, default=50000,
+                        help="per-row primitives above this size are timed on a sample and scaled")
+    parser.add_argument("--dense-max", type=int, default=5000,
+                        help="largest catalog whose dense N x N similarity matrix is materialized")
+    parser.add_argument("--min-rounds", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to keep repeating a fast call")
+    parser.add_argument("--max-time", type=float, default=10.0, help="a call slower than this runs once")
+    parser.add_argument("--json", help="also write all timings to this file")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(BENCHMARKS)
+    results = {name: {} for name in names}
+    for n in args.sizes:
+        catalog = Catalog(n, args.max_rows, args.dense_max)
+        print(f"🎬 {n} movies")
+        for name in names:
+            call, scale = BENCHMARKS[name](catalog)
+            timings = measure(call, args.min_rounds, args.min_time, args.max_time)
+            median = statistics.median(timings)
+            results[name][n] = {
+                "estimated": scale > 1,
+                "scale": scale,
+                "rounds": len(timings),
+                "min_s": min(timings) * scale,
+                "median_s": median * scale,
+                "mean_s": statistics.fmean(timings) * scale,
+                "stddev_s": (statistics.stdev(timings) if len(timings) > 1 else 0.0) * scale,
+            }
+            marker = "~" if scale > 1 else " "
+            print(f"   {name:<18} {marker}{format_seconds(median * scale):>11}  ({len(timings)} rounds)")
+        del catalog
+
+    print(f"\n{'primitive':<18}" + "".join(f"{n:>13}" for n in args.sizes) + f"{'exponent':>10}")
+    for name in names:
+        cells = []
+        for n in args.sizes:
+            row = results[name][n]
+            cells.append(("~" if row["estimated"] else "") + format_seconds(row["median_s"]))
+        exponent = None
+        if len(args.sizes) > 1:
+            small, large = args.sizes[-2], args.sizes[-1]
+            exponent = math.log(results[name][large]["median_s"] / results[name][small]["median_s"]) / \
+                math.log(large / small)
+            results[name]["exponent"] = exponent
+        flag = "  ⚠️ superlinear" if exponent is not None and exponent >= 1.5 else ""
+        exponent_text = f"{exponent:>10.2f}" if exponent is not None else f"{'':>10}"
+        print(f"{name:<18}" + "".join(f"{cell:>13}" for cell in cells) + exponent_text + flag)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"sizes": args.sizes, "max_rows": args.max_rows, "dense_max": args.dense_max,
+                       "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
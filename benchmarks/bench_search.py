@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Latency of /search queries against the title search index on a large
+synthetic catalog, compared with the original pandas str.contains scan
+
+Usage (from the project root):
+    python -m benchmarks.bench_search [--titles 500000] [--queries a th sta "star w" galaxi]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from title_index import SearchIndex
+
+WORDS = ("the a of and star night love last dark man return world war city king day house "
+         "dead life lost story black time blood secret island american great little big red "
+         "girl boy home ghost legend galaxy empire rise fall shadow storm river road game").split()
+
+
+def synthetic_titles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 6, size=n)
+    words = rng.choice(WORDS, size=lengths.sum())
+    cuts = np.cumsum(lengths)[:-1]
+    return [" ".join(parts).title() for parts in np.split(words, cuts)]
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark title search")
+    parser.add_argument("--titles", type=int, default=500000)
+    parser.add_argument("--queries", nargs="+", default=["a", "s", "th", "st", "sta", "gal", "star w", "galaxi"])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    titles = pd.Series(synthetic_titles(args.titles))
+    start = time.perf_counter()
+    index = SearchIndex(titles)
+    print(f"🎬 {args.titles} titles, index built in {time.perf_counter() - start:.1f}s")
+    print(f"{'query':<10} {'matches':>9} {'contains (ms)':>14} {'cold (ms)':>10} {'cached (ms)':>12}")
+
+    for query in args.queries:
+        contains_ms = median_ms(lambda: titles[titles.str.contains(query, case=False, na=False)].tolist(),
+                                args.repeat)
+        start = time.perf_counter()
+        _, total = index.search(query, limit=20)
+        cold_ms = (time.perf_counter() - start) * 1000
+        cached_ms = median_ms(lambda: index.search(query, limit=20, offset=20), args.repeat)
+        print(f"{query:<10} {total:>9} {contains_ms:>14.2f} {cold_ms:>10.2f} {cached_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Per-request latency of top-K selection: the original sorted(enumerate(...))
+approach versus the argpartition-based neighbors.top_k
+
+Usage (from the project root):
+    python -m benchmarks.bench_topk [--sizes 5000 500000] [--repeat 20]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from neighbors import top_k
+
+
+def sorted_top_k(distances, movie_index, k=5):
+    """Original recommend() selection, kept for comparison"""
+    return sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:k + 1]
+
+
+def time_per_call(func, rows, repeat):
+    """Median wall time of func(row, i) in milliseconds"""
+    timings = []
+    for i in range(repeat):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        func(row, i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark top-K selection")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 500000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(42)
+    print(f"{'movies':>10} {'sorted (ms)':>14} {'top_k (ms)':>12} {'speedup':>9}")
+    for n in args.sizes:
+        rows = [rng.random(n) for _ in range(3)]
+        before = time_per_call(lambda row, i: sorted_top_k(row, i, args.k), rows, args.repeat)
+        after = time_per_call(lambda row, i: top_k(row, args.k, exclude=i), rows, args.repeat)
+        print(f"{n:>10} {before:>14.3f} {after:>12.3f} {before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
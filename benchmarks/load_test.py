@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Throughput of the production server (gunicorn, see gunicorn.conf.py) as the
+number of workers grows, to show requests/s scaling with cores
+
+Each run starts gunicorn on a free local port with API_WORKERS set, waits for
+/health and drives POST /recommend/batch (single random title, no TMDB
+lookups, so the server is CPU-bound) or GET /search from several client
+processes for a fixed duration.
+
+Usage (from the project root, with the model artifacts built):
+    python -m benchmarks.load_test [--workers 1 2 4 8] [--duration 15] [--clients 4] [--concurrency 8]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import requests
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, port, threads):
+    env = dict(os.environ, API_WORKERS=str(workers), API_THREADS=str(threads),
+               API_BIND=f"127.0.0.1:{port}", MODEL_WATCH_INTERVAL="0")
+    return subprocess.Popen(["gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(base_url, timeout=180):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not become ready in {timeout}s")
+
+
+def client(base_url, endpoint, titles, duration, concurrency, seed):
+    """Run concurrency keep-alive threads for duration seconds, return latencies (s) and errors"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def loop(thread_seed):
+        rng = random.Random(thread_seed)
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            title = rng.choice(titles)
+            start = time.perf_counter()
+            try:
+                if endpoint == "search":
+                    response = session.get(f"{base_url}/search", params={"q": title[:3]}, timeout=30)
+                else:
+                    response = session.post(f"{base_url}/recommend/batch", json={"titles": [title]}, timeout=30)
+                ok = response.ok
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=loop, args=(seed * 1000 + i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def run(workers, args, titles):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(workers, port, args.threads)
+    try:
+        wait_ready(base_url)
+        # Warm-up so every worker has built its caches
+        client(base_url, args.endpoint, titles, 2, args.concurrency, seed=0)
+        with ProcessPoolExecutor(args.clients) as pool:
+            futures = [pool.submit(client, base_url, args.endpoint, titles, args.duration, args.concurrency, seed)
+                       for seed in range(1, args.clients + 1)]
+            results = [future.result() for future in futures]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = np.array([latency for result in results for latency in result[0]])
+    errors = sum(result[1] for result in results)
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000) if len(latencies) else float("nan"),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000) if len(latencies) else float("nan"),
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Load test the API under gunicorn with growing worker counts")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores} & set(range(1, cores + 1))))
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--endpoint", choices=["batch", "search"], default="batch")
+    parser.add_argument("--duration", type=float, default=15, help="seconds of load per worker count")
+    parser.add_argument("--clients", type=int, default=max(cores // 2, 1), help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="connections per client process")
+    args = parser.parse_args(argv)
+
+    if shutil.which("gunicorn") is None:
+        print("❌ gunicorn is not installed (pip install gunicorn)")
+        return 1
+
+    from artifacts import load_model
+    movies_df, _ = load_model()
+    titles = movies_df["title"].tolist()
+
+    print(f"🎬 {len(titles)} movies, {cores} cores, {args.clients} x {args.concurrency} client connections, "
+          f"{args.endpoint} endpoint")
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'p50 (ms)':>10} {'p99 (ms)':>10} {'errors':>7}")
+    baseline = None
+    for workers in args.workers:
+        result = run(workers, args, titles)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>8} {result['rps']:>10.1f} {result['rps'] / baseline:>7.2f}x "
+              f"{result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['errors']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Where /recommend spends its time: sends requests with `X-Server-Timing: 1`
+and aggregates the per-stage times of the Server-Timing headers (resolve,
+cache, neighbors, rows, enrich, serialize, total) into a report
+
+By default the Flask app is loaded in-process (the model from artifacts/,
+TMDB from TMDB_API_URL); with --url a running server (Flask or async) is
+profiled over HTTP. Titles are drawn from --distinct movies, so the report
+mixes response cache misses and hits.
+
+Usage (from the project root):
+    python -m benchmarks.profile_recommend [--requests 500] [--distinct 100] [--url http://localhost:5000]
+                                           [--json profile.json]
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from timing import REQUEST_HEADER, parse_server_timing
+
+STAGES = ("resolve", "cache", "neighbors", "rows", "enrich", "serialize", "total")
+
+
+def in_process_client():
+    """(titles, post) for the Flask app in this process"""
+    import flask_api
+    flask_api.init_worker()
+    client = flask_api.app.test_client()
+
+    def post(title):
+        response = client.post("/recommend", json={"title": title}, headers={REQUEST_HEADER: "1"})
+        return response.status_code, response.headers.get("Server-Timing", "")
+
+    return flask_api.models.current.movies_df["title"].tolist(), post
+
+
+def http_client(base_url):
+    """(titles, post) for a server running at base_url"""
+    import requests
+    session = requests.Session()
+    titles = session.get(f"{base_url}/movies", timeout=30).json()["movies"]
+
+    def post(title):
+        response = session.post(f"{base_url}/recommend", json={"title": title},
+                                headers={REQUEST_HEADER: "1"}, timeout=60)
+        return response.status_code, response.headers.get("Server-Timing", "")
+
+    return titles, post
+
+
+def profile(post, titles, requests_count):
+    """Per-stage millisecond samples of requests_count requests for random titles"""
+    samples = {}
+    errors = 0
+    for _ in range(requests_count):
+        status, header = post(random.choice(titles))
+        if status != 200 or not header:
+            errors += 1
+            continue
+        for stage, ms in parse_server_timing(header).items():
+            samples.setdefault(stage, []).append(ms)
+    return samples, errors
+
+
+def report(samples, requests_count):
+    """Count, mean, percentiles and share of the total time of every stage"""
+    total_ms = sum(samples.get("total", [])) or float("nan")
+    stages = [stage for stage in STAGES if stage in samples] + sorted(set(samples) - set(STAGES))
+    rows = {}
+    for stage in stages:
+        values = np.array(samples[stage])
+        rows[stage] = {
+            "count": len(values),
+            "share_of_requests": len(values) / requests_count,
+            "mean_ms": float(values.mean()),
+            "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)),
+            "p99_ms": float(np.percentile(values, 99)),
+            "share_of_time": float(values.sum() / total_ms),
+        }
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage latency profile of /recommend")
+    parser.add_argument("--url", help="profile a running server instead of the in-process Flask app")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=100, help="number of different titles requested")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    titles, post = http_client(args.url.rstrip("/")) if args.url else in_process_client()
+    titles = random.sample(titles, min(args.distinct, len(titles)))
+
+    start = time.perf_counter()
+    samples, errors = profile(post, titles, args.requests)
+    elapsed = time.perf_counter() - start
+    rows = report(samples, args.requests)
+
+    print(f"🎬 {args.requests} requests for {len(titles)} titles in {elapsed:.1f}s ({errors} errors)")
+    print(f"{'stage':<10} {'count':>6} {'mean (ms)':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'% time':>7}")
+    for stage, row in rows.items():
+        print(f"{stage:<10} {row['count']:>6} {row['mean_ms']:>10.3f} {row['p50_ms']:>9.3f} "
+              f"{row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f} {row['share_of_time'] * 100:>6.1f}%")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"requests": args.requests, "distinct": len(titles), "errors": errors,
+                       "url": args.url, "stages": rows}, f, indent=2)
+        print(f"💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
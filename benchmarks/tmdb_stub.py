@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the TMDB /movie/{id} API with injectable latency, for
+benchmarks that must not depend on (or hammer) the real service
+
+An asyncio server, so hundreds of concurrent requests each wait their own
+latency instead of queueing on threads. Answers every movie ID with a fixed
+document shaped like TMDB's; IDs in error_ids get a 404.
+
+Usage (from the project root):
+    python -m benchmarks.tmdb_stub [--port 8765] [--latency 0.05] [--jitter 0.02]
+    export TMDB_API_URL=http://127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+
+
+class TMDBStub:
+    """TMDB stub server running on its own event loop thread"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_ids=()):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_ids = set(error_ids)
+        self.requests = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving in a background thread; returns once the port is bound"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=4096))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="tmdb-stub", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+            self._loop = None
+
+    async def _shutdown(self):
+        # Close the open keep-alive connections before the loop stops
+        self._server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                # Skip the headers; the stub only serves bodiless GETs
+                while (await reader.readline()) not in (b"\r\n", b""):
+                    pass
+                self.requests += 1
+                delay = self.latency + random.uniform(0, self.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writer.write(self._response(request_line.split()[1].decode()))
+                await writer.drain()
+        except (ConnectionError, IndexError):
+            pass
+        except asyncio.CancelledError:
+            # Stopped by _shutdown; finish normally so asyncio doesn't report it
+            pass
+        finally:
+            writer.close()
+
+    def _response(self, path):
+        movie_id = path.split("?")[0].rsplit("/", 1)[-1]
+        if not movie_id.isdigit() or int(movie_id) in self.error_ids:
+            status, body = "404 Not Found", b'{"status_message": "The resource could not be found."}'
+        else:
+            status, body = "200 OK", json.dumps({
+                "id": int(movie_id),
+                "poster_path": f"/poster{movie_id}.jpg",
+                "vote_average": 7.1,
+                "release_date": "2009-12-10",
+                "runtime": 120,
+                "genres": [{"id": 28, "name": "Action"}, {"id": 12, "name": "Adventure"}],
+                "overview": "A stub overview. " * 20,
+            }).encode()
+        head = f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        return head.encode() + body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local TMDB stub with injectable latency")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random delay (seconds)")
+    args = parser.parse_args(argv)
+
+    stub = TMDBStub(args.host, args.port, args.latency, args.jitter).start()
+    print(f"🎭 TMDB stub on {stub.url} ({args.latency * 1000:.0f} ms + up to {args.jitter * 1000:.0f} ms)")
+    try:
+        stub._thread.join()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Build the model artifacts used by the Flask API and the Streamlit app
+
+Reproduces the feature pipeline of movie_recomended_with_UI.ipynb from the
+TMDB CSV files (or converts the notebook's pickle output) and writes a new
+versioned artifact directory (see artifacts.py), printing the time spent in
+every stage.
+
+Usage:
+    python build_index.py [--source csv] [--movies-csv tmdb_5000_movies.csv]
+                          [--credits-csv tmdb_5000_credits.csv] [--jobs 4]
+                          [--output artifacts] [--k 20] [--store-vectors]
+    python build_index.py --source pickle [--movies movie_dict.pkl] [--similarity similarity.pkl]
+"""
+
+import argparse
+import ast
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+from artifacts import ARTIFACTS_DIR, new_version, publish_version, save_artifacts
+from neighbors import (DEFAULT_K, SIMILARITY_FILE, build_neighbor_index,
+                       build_neighbor_index_from_vectors)
+
+MOVIES_CSV = "tmdb_5000_movies.csv"
+CREDITS_CSV = "tmdb_5000_credits.csv"
+MAX_FEATURES = 5000
+CHUNK_SIZE = 1000
+
+
+@contextmanager
+def stage(name, timings):
+    """Time a build stage and print how long it took"""
+    start = time.perf_counter()
+    yield
+    timings[name] = round(time.perf_counter() - start, 3)
+    print(f"⏱️  {name:<12} {timings[name]:>8.2f}s")
+
+
+def parse_json_list(value):
+    """Parse one of TMDB's JSON-encoded list columns"""
+    if not isinstance(value, str):
+        return []
+    try:
+        return json.loads(value)
+    except ValueError:
+        # Older exports use Python literal syntax
+        return ast.literal_eval(value)
+
+
+def names(value, limit=None):
+    """Names from a JSON list column, e.g. genres or the top 3 cast members"""
+    return [item["name"] for item in parse_json_list(value)[:limit]]
+
+
+def directors(value):
+    """First director from the crew column"""
+    for member in parse_json_list(value):
+        if member["job"] == "Director":
+            return [member["name"]]
+    return []
+
+
+@lru_cache(maxsize=None)
+def stem_word(word):
+    return _stemmer().stem(word)
+
+
+@lru_cache(maxsize=1)
+def _stemmer():
+    from nltk.stem.porter import PorterStemmer
+    return PorterStemmer()
+
+
+def build_tags(chunk):
+    """Turn a chunk of merged movie rows into (movie_id, title, tags)
+
+    Runs in a worker process. Matches the notebook: overview words + genres +
+    keywords + top 3 cast + director, spaces inside names replaced by
+    underscores, lower-cased and Porter-stemmed.
+    """
+    tags = []
+    for overview, genres, keywords, cast, crew in zip(
+            chunk["overview"], chunk["genres"], chunk["keywords"], chunk["cast"], chunk["crew"]):
+        words = overview.split() if isinstance(overview, str) else []
+        for tokens in (names(genres), names(keywords), names(cast, 3), directors(crew)):
+            words.extend(token.replace(" ", "_") for token in tokens)
+        tags.append(" ".join(stem_word(word) for word in " ".join(words).lower().split()))
+    return pd.DataFrame({"movie_id": chunk["movie_id"].values, "title": chunk["title"].values, "tags": tags})
+
+
+def read_csv_columns(path, columns, chunk_size=CHUNK_SIZE):
+    """Read only the needed columns of a CSV, chunk by chunk"""
+    return pd.concat(pd.read_csv(path, usecols=columns, chunksize=chunk_size), ignore_index=True)
+
+
+def build_from_csv(args, timings):
+    """Notebook pipeline: CSV -> tags -> bag of words -> neighbor index"""
+    with stage("read", timings):
+        movies = read_csv_columns(args.movies_csv, ["title", "overview", "genres", "keywords"])
+        credits = read_csv_columns(args.credits_csv, ["movie_id", "title", "cast", "crew"])
+        movies = movies.merge(credits, on="title")
+
+    with stage("tags", timings):
+        chunks = [movies.iloc[start:start + args.chunk_size]
+                  for start in range(0, len(movies), args.chunk_size)]
+        if args.jobs > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                parts = list(executor.map(build_tags, chunks))
+        else:
+            parts = [build_tags(chunk) for chunk in chunks]
+        movies = pd.concat(parts, ignore_index=True)
+
+    with stage("vectorize", timings):
+        vectorizer = CountVectorizer(max_features=args.max_features, stop_words="english")
+        vectors = vectorizer.fit_transform(movies["tags"])  # kept sparse
+
+    with stage("neighbors", timings):
+        index = build_neighbor_index_from_vectors(vectors, k=args.k)
+
+    return movies, index, vectors
+
+
+def build_from_pickle(args, timings):
+    """Convert the notebook's movie_dict.pkl and similarity.pkl"""
+    with stage("read", timings):
+        with open(args.movies, "rb") as f:
+            movies = pd.DataFrame(pickle.load(f))
+        with open(args.similarity, "rb") as f:
+            similarity = pickle.load(f)
+
+    with stage("neighbors", timings):
+        index = build_neighbor_index(similarity, k=args.k)
+
+    return movies, index, None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the movie recommendation artifacts")
+    parser.add_argument("--source", choices=["csv", "pickle"], default="csv",
+                        help="build from the TMDB CSV files or from the notebook's pickle files")
+    parser.add_argument("--movies-csv", default=MOVIES_CSV)
+    parser.add_argument("--credits-csv", default=CREDITS_CSV)
+    parser.add_argument("--movies", default="movie_dict.pkl", help="movie catalog pickle")
+    parser.add_argument("--similarity", default=SIMILARITY_FILE, help="dense similarity matrix pickle")
+    parser.add_argument("--output", default=ARTIFACTS_DIR, help="versioned artifact root to write into")
+    parser.add_argument("--version", default=None, help="version name (default: UTC timestamp)")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="neighbors to keep per movie")
+    parser.add_argument("--max-features", type=int, default=MAX_FEATURES)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for parsing and stemming")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--store-vectors", action="store_true",
+                        help="also store the sparse vectors for NEIGHBOR_MODE=sparse serving")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Build a new artifact version and make it current"""
+    args = parse_args(argv)
+    version = args.version or new_version()
+    timings = {}
+    print(f"🎬 Building artifacts version {version} from {args.source}")
+
+    total_start = time.perf_counter()
+    if args.source == "csv":
+        movies, index, vectors = build_from_csv(args, timings)
+    else:
+        movies, index, vectors = build_from_pickle(args, timings)
+    if args.store_vectors and vectors is None:
+        raise SystemExit("❌ --store-vectors needs --source csv")
+
+    with stage("write", timings):
+        path = os.path.join(args.output, version)
+        manifest = save_artifacts(path, movies["movie_id"], movies["title"], index, version=version,
+                                  build_info={"source": args.source, "max_features": args.max_features,
+                                              "timings": timings},
+                                  vectors=vectors if args.store_vectors else None)
+        publish_version(args.output, version)
+
+    print(f"✅ Wrote {path}/ ({manifest['count']} movies x {manifest['k']} neighbors) "
+          f"in {time.perf_counter() - total_start:.2f}s")
+    return manifest
+
+
+if __name__ == "__main__":
+    main()
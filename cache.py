@@ -0,0 +1,62 @@
+"""
+Small in-memory caches shared by the servers
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries optionally expire after ttl seconds"""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key, default=None, count=True):
+        """Return the cached value for key, or default when missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._data.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            if count:
+                self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Store value, evicting the least recently used entry when full"""
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry (the hit/miss counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Size and hit/miss counters"""
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_MISSING = object()
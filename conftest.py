@@ -0,0 +1,57 @@
+"""
+Shared test fixtures: local JSON HTTP servers standing in for TMDB and the API
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Records each request on the server and answers with server.answer(server, method, path, body)"""
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+    def do_GET(self):
+        self.respond(None)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.bodies.append(body)
+        self.respond(body)
+
+    def respond(self, body):
+        self.server.requests.append(self.path)
+        self.server.client_ports.add(self.client_address[1])
+        status, payload = self.server.answer(self.server, self.command, self.path, body)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serve_stub():
+    """Start a stub server for an answer(server, method, path, body) -> (status, payload) function"""
+    servers = []
+
+    def serve(answer):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        server.answer = answer
+        server.requests = []
+        server.bodies = []
+        server.client_ports = set()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
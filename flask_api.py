@@ -1,143 +1,129 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
-import pickle
-import requests
 import os
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import time
+import metrics
+from reloader import ModelReloader
+from recommender import enrich
+from metadata_store import MetadataStore
+from request_log import log_request, setup_logging
+from serving import (ADMIN_TOKEN, METADATA_DEADLINE, MODEL_WATCH_INTERVAL, RECOMMEND_K, batch_payload,
+                     batch_recommendations, cache_recommendation, load_served_model, multi_cache_key,
+                     multi_payload, parse_batch, parse_multi, recommend_payload, recommend_row)
+from timing import StageTimer, timing_requested
+from tmdb_client import TMDBClient
 
 app = Flask(__name__)
 CORS(app, resources={
     r"/*": {
         "origins": "*",
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization", "X-Server-Timing"],
+        "expose_headers": ["Server-Timing"]
     }
 })  # Enable CORS for Flutter app
 
-# Load data using pickle files (enhanced version)
-try:
-    # Try to load from pickle files first
-    with open('movie_dict.pkl', 'rb') as f:
-        movie_dict = pickle.load(f)
-    movies_df = pd.DataFrame(movie_dict)
-    
-    with open('similarity.pkl', 'rb') as f:
-        similarity = pickle.load(f)
-    
-    print("✅ Loaded data from pickle files")
-    
-except FileNotFoundError:
-    print("⚠️ Pickle files not found, loading from CSV...")
-    # Fallback to CSV loading
-    movies = pd.read_csv("tmdb_5000_movies.csv")
-    credits = pd.read_csv("tmdb_5000_credits.csv")
-    
-    # Merge datasets
-    movies = movies.merge(credits, on='title')
-    movies_df = movies[['movie_id', 'title', 'overview', 'genres', 'keywords', 'cast', 'crew']].dropna()
-    
-    # Preprocessing function
-    def preprocess_text(data):
-        return str(data['genres']) + " " + str(data['keywords']) + " " + str(data['cast']) + " " + str(data['crew'])
-    
-    movies_df['tags'] = movies_df.apply(preprocess_text, axis=1)
-    
-    # Text vectorization and similarity
-    vectorizer = CountVectorizer(max_features=5000, stop_words='english')
-    vectors = vectorizer.fit_transform(movies_df['tags']).toarray()
-    similarity = cosine_similarity(vectors)
-    
-    print("✅ Generated similarity matrix from CSV")
+# The served model (catalog, search index, recommender, precomputed /movies bodies).
+# Handlers read models.current once, so a reload never changes the model under a
+# running request
+models = ModelReloader(load_served_model)
 
-# Add request logging middleware
+# Request metrics and sampled structured logs (see metrics.py and request_log.py)
 @app.before_request
-def log_request_info():
-    print(f"📥 Incoming request: {request.method} {request.url}")
-    print(f"   Headers: {dict(request.headers)}")
-    if request.data:
-        print(f"   Body: {request.data}")
+def start_timer():
+    g.request_start = time.perf_counter()
 
 @app.after_request
-def log_response_info(response):
-    print(f"📤 Response: {response.status_code}")
+def record_request(response):
+    elapsed = time.perf_counter() - g.get('request_start', time.perf_counter())
+    # Label by route template, so unknown paths don't create new series
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe_request(route, request.method, response.status_code, elapsed)
+    log_request(request.method, route, request.path, response.status_code, elapsed)
     return response
 
-def fetch_poster(movie_id):
-    """Fetch movie poster from TMDB API"""
-    try:
-        response = requests.get(
-            f"https://api.themoviedb.org/3/movie/{movie_id}?api_key=75b3c80c1a67275c04868a92f6f50a4b",
-            timeout=5
-        )
-        data = response.json()
-        if "poster_path" in data and data["poster_path"]:
-            return "https://image.tmdb.org/t/p/w500/" + data["poster_path"]
-        else:
-            return None
-    except:
-        return None
+# Shared pooled, cached TMDB client, reading the on-disk metadata store first.
+# Created per process by init_worker, so no connection is opened before the fork
+tmdb = None
+metrics.register_cache('recommend', lambda: models.current.recommender.cache)
+metrics.register_cache('tmdb', lambda: tmdb.cache if tmdb is not None else None)
 
-def fetch_movie_details(movie_id):
-    """Fetch additional movie details from TMDB API"""
-    try:
-        response = requests.get(
-            f"https://api.themoviedb.org/3/movie/{movie_id}?api_key=75b3c80c1a67275c04868a92f6f50a4b",
-            timeout=5
-        )
-        data = response.json()
-        return {
-            "rating": data.get("vote_average", "N/A"),
-            "release_date": data.get("release_date", "N/A"),
-            "overview": data.get("overview", "No overview available")[:200] + "..." if data.get("overview") else "No overview available",
-            "runtime": data.get("runtime", "N/A"),
-            "genres": [genre["name"] for genre in data.get("genres", [])]
-        }
-    except:
-        return {
-            "rating": "N/A",
-            "release_date": "N/A",
-            "overview": "Details unavailable",
-            "runtime": "N/A",
-            "genres": []
-        }
+def init_worker():
+    """Start the per-process parts of the server: TMDB client, log writer and model watcher
+
+    Called once in every serving process. With a preloaded app (gunicorn
+    preload_app) the model is loaded before workers fork and shared
+    copy-on-write, but sockets, the TMDB thread pool and the SQLite
+    connection must not cross the fork and threads do not survive it.
+    """
+    global tmdb
+    tmdb = TMDBClient(timeout=5, store=MetadataStore())
+    setup_logging()
+    if MODEL_WATCH_INTERVAL > 0:
+        models.watch(MODEL_WATCH_INTERVAL)
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'message': 'Movie Recommendation API is running!'})
 
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Size and hit/miss counters of the server-side caches"""
+    return jsonify({
+        'recommend': models.current.recommender.cache.stats(),
+        'tmdb': tmdb.cache.stats()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request, cache and TMDB metrics of this process in the Prometheus text format"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/admin/model', methods=['GET'])
+def model_status():
+    """Artifact version being served and the state of the last reload"""
+    return jsonify(models.status())
+
+@app.route('/admin/reload', methods=['POST'])
+def reload_model():
+    """Load the published artifact version in the background and swap it in when ready"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Reloading is disabled, set ADMIN_TOKEN to enable it'}), 404
+    if request.headers.get('Authorization') != f'Bearer {ADMIN_TOKEN}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    started = models.reload(wait=request.args.get('wait') == '1')
+    status = models.status()
+    status['started'] = started
+    return jsonify(status), 202 if started else 409
+
 @app.route('/movies', methods=['GET'])
 def get_movies():
-    """Get all available movies"""
+    """Get all available movies (optionally paginated by cursor, with field selection)"""
     try:
-        movies_list = movies_df['title'].tolist()
-        return jsonify({
-            'movies': movies_list,
-            'count': len(movies_list)
-        })
+        try:
+            precomputed = models.current.movies_response_for(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        status, body, headers = precomputed.negotiate(request.headers.get('Accept-Encoding', ''),
+                                                      request.headers.get('If-None-Match', ''))
+        if status == 304:
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.headers.update(headers)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/search', methods=['GET'])
 def search_movies():
-    """Search movies by title"""
+    """Search movies by title (prefix and typo tolerant, ranked, paginated)"""
     try:
-        query = request.args.get('q', '').strip()
-        if not query:
-            return jsonify({'error': 'Query parameter is required'}), 400
-        
-        # Case insensitive search
-        filtered_movies = movies_df[movies_df['title'].str.contains(query, case=False, na=False)]
-        movies_list = filtered_movies['title'].tolist()
-        
-        return jsonify({
-            'movies': movies_list,
-            'count': len(movies_list),
-            'query': query
-        })
+        try:
+            return jsonify(models.current.search(request.args))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -145,72 +131,102 @@ def search_movies():
 def recommend():
     """Get movie recommendations"""
     try:
-        data = request.json
-        movie_title = data.get('title')
+        # Time of each stage, sent back in Server-Timing on request (see timing.py)
+        timer = StageTimer('/recommend')
+        # A malformed or non-JSON body reads as None: a 400 below, as in async_api
+        data = request.get_json(silent=True)
+        movie_title = data.get('title') if isinstance(data, dict) else None
         
         if movie_title is None or movie_title == "":
             return jsonify({'error': 'Movie title is required'}), 400
         
-        # Find movie in database
-        movie_matches = movies_df[movies_df['title'].str.contains(movie_title, case=False, na=False)]
+        # The whole request is answered from the model that was current when it started
+        recommender = models.current.recommender
+        
+        # Find movie in database: exact title first, then first partial match
+        with timer.stage('resolve'):
+            movie_index = recommender.title_index.resolve(movie_title)
         
-        if movie_matches.empty:
+        if movie_index is None:
             return jsonify({'error': f'Movie "{movie_title}" not found'}), 404
         
-        # Get the first match
-        movie_index = movie_matches.index[0]
-        movie_id = movies_df.iloc[movie_index]['movie_id']
-        actual_title = movies_df.iloc[movie_index]['title']
+        # Popular titles are answered from the response cache of the loaded model
+        cache_key = (movie_index, RECOMMEND_K, True)
+        with timer.stage('cache'):
+            response = recommender.cache.get(cache_key)
+        if response is None:
+            # Look up the precomputed most similar movies
+            result = recommend_row(recommender, movie_index, timer)
+            
+            # Fetch metadata for all recommendations concurrently, keeping whatever
+            # finished within the deadline
+            with timer.stage('enrich'):
+                partial = enrich(result['recommendations'], tmdb, deadline=METADATA_DEADLINE)
+            response = recommend_payload(result, partial)
+            cache_recommendation(recommender, cache_key, response, tmdb)
+        with timer.stage('serialize'):
+            http_response = jsonify(response)
+        server_timing = timer.finish()
+        if timing_requested(request.headers):
+            http_response.headers['Server-Timing'] = server_timing
+        return http_response
         
-        # Calculate similarity
-        distances = similarity[movie_index]
-        movie_indices = sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:6]
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/recommend/multi', methods=['POST'])
+def recommend_multi():
+    """Get recommendations for several (optionally weighted) favorite movies together"""
+    try:
+        titles, weights = parse_multi(request.get_json(silent=True))
+        recommender = models.current.recommender
+        cache_key = multi_cache_key(titles, weights)
+        response = recommender.cache.get(cache_key)
+        if response is None:
+            result = recommender.recommend_multi(titles, weights=weights, n=RECOMMEND_K)
+            if not result['input_movies']:
+                return jsonify({'error': 'None of the movies were found', 'not_found': result['not_found']}), 404
+            partial = enrich(result['recommendations'], tmdb, deadline=METADATA_DEADLINE)
+            response = multi_payload(result, partial)
+            cache_recommendation(recommender, cache_key, response, tmdb)
+        return jsonify(response)
         
-        recommendations = []
-        for i, score in movie_indices:
-            movie_data = movies_df.iloc[i]
-            movie_id = movie_data['movie_id']
-            title = movie_data['title']
-            
-            # Get poster and details
-            poster_url = fetch_poster(movie_id)
-            details = fetch_movie_details(movie_id)
-            
-            recommendations.append({
-                'title': title,
-                'movie_id': int(movie_id),
-                'similarity_score': float(score),
-                'poster_url': poster_url,
-                'rating': details['rating'],
-                'release_date': details['release_date'],
-                'overview': details['overview'],
-                'runtime': details['runtime'],
-                'genres': details['genres']
-            })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/recommend/batch', methods=['POST'])
+def recommend_batch():
+    """Get recommendations for many movies (titles and/or movie IDs) in one call"""
+    try:
+        seeds, k, partial_titles, with_metadata = parse_batch(request.get_json(silent=True))
+        results = models.current.recommender.recommend_batch(seeds, n=k, partial=partial_titles)
         
-        return jsonify({
-            'input_movie': actual_title,
-            'recommendations': recommendations,
-            'count': len(recommendations)
-        })
+        partial = False
+        if with_metadata:
+            partial = enrich(batch_recommendations(results), tmdb, deadline=METADATA_DEADLINE)
+        return jsonify(batch_payload(results, partial))
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 if __name__ == '__main__':
-    print("🎬 Starting Movie Recommendation API...")
-    print(f"📊 Loaded {len(movies_df)} movies")
+    # Development server; run `python wsgi.py` (gunicorn / waitress) in production
+    debug = os.environ.get("FLASK_DEBUG") == "1"
+    print("🎬 Starting Movie Recommendation API (development server)...")
+    print(f"📊 Loaded {len(models.current.movies_df)} movies (version {models.version})")
     print("🚀 Server running on http://localhost:5000")
     print("📱 Flutter app can connect to: http://10.0.2.2:5000 (Android Emulator)")
     print("📱 Flutter app can connect to: http://localhost:5000 (iOS Simulator)")
-    print("🔧 Debug mode enabled")
-    
-    # Add request logging
-    import logging
-    logging.basicConfig(level=logging.INFO)
+    if debug:
+        print("🔧 Debug mode enabled")
     
     try:
-        app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
+        init_worker()
+        app.run(debug=debug, host='0.0.0.0', port=5000, threaded=True)
     except Exception as e:
         print(f"❌ Error starting server: {e}")
         import traceback
@@ -35,13 +35,24 @@ def install_requirements():
 
 def check_data_files():
     """Check if required data files exist"""
-    required_files = ["movie_dict.pkl", "movies.pkl", "similarity.pkl"]
+    # Imported here: it needs the dependencies, which main() installs first
+    from artifacts import ARTIFACTS_DIR, resolve_artifact_dir
+
+    # The apps load the built artifacts when present and need nothing else
+    if resolve_artifact_dir(ARTIFACTS_DIR) is not None:
+        return []
+    
+    required_files = ["movie_dict.pkl", "movies.pkl"]
     missing_files = []
     
     for file in required_files:
         if not os.path.exists(file):
             missing_files.append(file)
     
+    # The neighbor index can be derived from similarity.pkl on first load
+    if not any(os.path.exists(f) for f in ["neighbors.pkl", "similarity.pkl"]):
+        missing_files.append("artifacts/")
+    
     return missing_files
 
 def start_flask_api():
@@ -53,7 +64,8 @@ def start_flask_api():
     print("-" * 60)
     
     try:
-        subprocess.run([sys.executable, "flask_api.py"])
+        # gunicorn (waitress on Windows) with the model preloaded; see wsgi.py
+        subprocess.run([sys.executable, "wsgi.py"])
     except KeyboardInterrupt:
         print("\n👋 Flask API server stopped")
 
@@ -124,7 +136,7 @@ def main():
     if choice in ['y', 'yes']:
         start_flask_api()
     else:
-        print("🔧 To start Flask API manually, run: python flask_api.py")
+        print("🔧 To start Flask API manually, run: python wsgi.py")
 
 if __name__ == "__main__":
     main()
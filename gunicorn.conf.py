@@ -0,0 +1,37 @@
+"""
+gunicorn settings for serving flask_api in production
+
+    gunicorn -c gunicorn.conf.py wsgi:app      (or simply: python wsgi.py)
+
+Every setting can be overridden from the environment (API_BIND, API_WORKERS,
+API_THREADS, API_TIMEOUT, API_KEEPALIVE).
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("API_BIND", "0.0.0.0:5000")
+
+# One process per core for the CPU-bound work (neighbor search, JSON); threads
+# in each worker overlap the waits on TMDB
+workers = int(os.environ.get("API_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("API_THREADS", 4))
+
+# Load the model once in the master: the memory-mapped arrays and everything
+# built from them are shared copy-on-write by all workers
+preload_app = True
+
+# Requests wait at most METADATA_DEADLINE (5 s by default) for TMDB
+timeout = int(os.environ.get("API_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = int(os.environ.get("API_KEEPALIVE", 5))
+
+accesslog = None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Per-process TMDB client and model watcher, which must not be shared across fork
+    import flask_api
+    flask_api.init_worker()
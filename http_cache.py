@@ -0,0 +1,74 @@
+"""
+Precomputed, compressed HTTP response bodies with strong ETags
+
+A PrecomputedResponse serializes and compresses a payload once; serving it
+is then a header check (If-None-Match -> 304) and picking the encoding the
+client accepts (br, gzip or identity). negotiate() returns plain
+(status, body, headers), which each server wraps in its own response type.
+"""
+
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is used when brotli is not installed
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+class PrecomputedResponse:
+    """A JSON body serialized and compressed once, served many times"""
+
+    def __init__(self, payload, min_compress_size=MIN_COMPRESS_SIZE):
+        self.body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.variants = {"identity": (self.body, f'"{digest}"')}
+        if len(self.body) >= min_compress_size:
+            self.variants["gzip"] = (gzip.compress(self.body, compresslevel=9, mtime=0), f'"{digest}-gzip"')
+            if brotli is not None:
+                self.variants["br"] = (brotli.compress(self.body), f'"{digest}-br"')
+
+    def select(self, accept_encoding):
+        """Best available encoding for an Accept-Encoding header"""
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return "identity"
+
+    def negotiate(self, accept_encoding="", if_none_match=""):
+        """(status, body, headers) for a request's Accept-Encoding and If-None-Match headers"""
+        encoding = self.select(accept_encoding)
+        body, etag = self.variants[encoding]
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            # Clients may keep the body but must revalidate it (cheap 304s)
+            "Cache-Control": "no-cache",
+        }
+        if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return 304, b"", headers
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return 200, body, headers
+
+
+def parse_accept_encoding(header):
+    """Map of encoding -> q value from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
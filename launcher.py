@@ -21,12 +21,14 @@ def check_python_version():
 
 def check_required_files():
     """Check if all required files exist"""
-    required_files = [
-        "movie_dict.pkl",
-        "movies.pkl", 
-        "Website.py",
-        "requirements.txt"
-    ]
+    # Imported here: it needs the dependencies, which main() installs first
+    from artifacts import ARTIFACTS_DIR, resolve_artifact_dir
+
+    has_artifacts = resolve_artifact_dir(ARTIFACTS_DIR) is not None
+    required_files = ["Website.py", "requirements.txt"]
+    if not has_artifacts:
+        # Without artifacts the model is loaded from the pickle files
+        required_files = ["movie_dict.pkl", "movies.pkl"] + required_files
     
     missing_files = []
     for file in required_files:
@@ -40,11 +42,14 @@ def check_required_files():
         return False
     
     # Check optional but important file
-    if not os.path.exists("similarity.pkl"):
-        print("⚠️  similarity.pkl not found - please run the notebook to generate it")
+    if has_artifacts:
+        print("✅ artifacts/ found")
+    elif os.path.exists("neighbors.pkl") or os.path.exists("similarity.pkl"):
+        print("⚠️  artifacts/ not found - run build_index.py to speed up startup")
         return "warning"
     else:
-        print("✅ similarity.pkl found")
+        print("⚠️  artifacts/ not found - please run the notebook and build_index.py to generate it")
+        return "warning"
     
     return True
 
@@ -82,6 +87,10 @@ def main():
     if not check_python_version():
         return
     
+    # Install requirements
+    if not install_requirements():
+        return
+    
     # Check required files
     file_check = check_required_files()
     if file_check is False:
@@ -89,10 +98,6 @@ def main():
         print("Run the Jupyter notebook to generate missing pickle files")
         return
     
-    # Install requirements
-    if not install_requirements():
-        return
-    
     # Run the application
     run_streamlit()
 
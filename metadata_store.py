@@ -0,0 +1,96 @@
+"""
+Persistent on-disk store of TMDB movie metadata
+
+A SQLite database keyed by movie_id, filled by prefetch_metadata.py and read
+by TMDBClient before it goes to the network, so recommendations keep their
+posters and details without outbound access.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+METADATA_DB = os.environ.get("METADATA_DB", "metadata.db")
+
+FIELDS = ["poster_path", "rating", "release_date", "runtime", "genres", "overview"]
+
+
+class MetadataStore:
+    """SQLite-backed movie_id -> metadata mapping, safe to share between threads"""
+
+    def __init__(self, path=METADATA_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            # WAL lets the servers keep reading while a prefetch is writing
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS movies (
+                    movie_id INTEGER PRIMARY KEY,
+                    poster_path TEXT,
+                    rating REAL,
+                    release_date TEXT,
+                    runtime INTEGER,
+                    genres TEXT,
+                    overview TEXT,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+
+    def get(self, movie_id):
+        """Stored metadata for one movie, or None"""
+        return self.get_many([movie_id]).get(int(movie_id))
+
+    def get_many(self, movie_ids, batch_size=500):
+        """Stored metadata for the given movies, as a dict of the ones found"""
+        movie_ids = [int(movie_id) for movie_id in movie_ids]
+        results = {}
+        with self._lock:
+            for start in range(0, len(movie_ids), batch_size):
+                batch = movie_ids[start:start + batch_size]
+                rows = self._connection.execute(
+                    f"SELECT movie_id, {', '.join(FIELDS)} FROM movies "
+                    f"WHERE movie_id IN ({', '.join('?' * len(batch))})",
+                    batch
+                )
+                for row in rows:
+                    movie = dict(zip(FIELDS, row[1:]))
+                    movie["genres"] = json.loads(movie["genres"] or "[]")
+                    results[row[0]] = movie
+        return results
+
+    def put(self, movie_id, movie):
+        """Store (or replace) the metadata of one movie"""
+        self.put_many({movie_id: movie})
+
+    def put_many(self, movies):
+        """Store a dict of movie_id -> metadata in one transaction"""
+        now = time.time()
+        rows = [
+            (int(movie_id), movie.get("poster_path"), movie.get("rating"), movie.get("release_date"),
+             movie.get("runtime"), json.dumps(movie.get("genres") or []), movie.get("overview"), now)
+            for movie_id, movie in movies.items()
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO movies (movie_id, {', '.join(FIELDS)}, fetched_at) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def missing(self, movie_ids):
+        """The movie_ids that have no stored metadata"""
+        movie_ids = [int(movie_id) for movie_id in movie_ids]
+        found = self.get_many(movie_ids)
+        return [movie_id for movie_id in movie_ids if movie_id not in found]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
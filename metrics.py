@@ -0,0 +1,168 @@
+"""
+In-process metrics of the API servers, exposed at /metrics in the Prometheus
+text format
+
+Counters and histograms are plain dicts of label values under a lock, so
+recording one observation costs well under a microsecond and needs no
+dependency. The cache counters are read from the caches when scraped. Every
+server process keeps its own numbers (one gunicorn worker per scrape).
+"""
+
+import bisect
+import threading
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    """Monotonic counter per combination of label values"""
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield self.name, dict(zip(self.labelnames, labelvalues)), value
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per combination of label values"""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labelvalues -> [count per bucket (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, *labelvalues):
+        entry = self._values.get(labelvalues)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self):
+        with self._lock:
+            values = [(labelvalues, list(counts), total) for labelvalues, (counts, total) in self._values.items()]
+        for labelvalues, counts, total in values:
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class CacheCollector:
+    """Hit/miss counters and size of TTLCaches, read when scraped
+
+    Caches are given as functions returning the current cache, since the
+    response cache is replaced with the model on every reload.
+    """
+
+    def __init__(self):
+        self.caches = {}
+
+    def samples(self):
+        stats = {}
+        for name, get_cache in list(self.caches.items()):
+            cache = get_cache()
+            if cache is not None:
+                stats[name] = cache.stats()
+        for metric, key, metric_type in (("cache_hits_total", "hits", "counter"),
+                                         ("cache_misses_total", "misses", "counter"),
+                                         ("cache_entries", "size", "gauge")):
+            yield metric, metric_type, [(metric, {"cache": name}, values[key]) for name, values in stats.items()]
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route, method and status",
+                   ("route", "method", "status"))
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route and method",
+                            ("route", "method"))
+STAGE_LATENCY = Histogram("request_stage_duration_seconds",
+                          "Time spent in each stage of a request (see timing.py)", ("route", "stage"))
+TMDB_REQUESTS = Counter("tmdb_requests_total", "TMDB /movie requests by outcome (ok, error)", ("outcome",))
+TMDB_LATENCY = Histogram("tmdb_request_duration_seconds", "TMDB /movie request latency")
+LOGS_DROPPED = Counter("request_logs_dropped_total", "Request log records dropped because the log queue was full")
+CACHES = CacheCollector()
+
+METRICS = [REQUESTS, REQUEST_LATENCY, STAGE_LATENCY, TMDB_REQUESTS, TMDB_LATENCY, LOGS_DROPPED]
+
+
+def observe_request(route, method, status, seconds):
+    """Record one served HTTP request"""
+    REQUESTS.inc(route, method, str(status))
+    REQUEST_LATENCY.observe(seconds, route, method)
+
+
+def observe_tmdb(ok, seconds):
+    """Record one TMDB request"""
+    TMDB_REQUESTS.inc("ok" if ok else "error")
+    TMDB_LATENCY.observe(seconds)
+
+
+def observe_dropped_log():
+    """Record one request log record dropped by a full log queue"""
+    LOGS_DROPPED.inc()
+
+
+def register_cache(name, get_cache):
+    """Export the counters of the cache returned by get_cache() as cache="name" """
+    CACHES.caches[name] = get_cache
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(_format_sample(*sample) for sample in metric.samples())
+    for name, metric_type, samples in CACHES.samples():
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(_format_sample(*sample) for sample in samples)
+    return "\n".join(lines) + "\n"
+
+
+def _format_sample(name, labels, value):
+    if labels:
+        label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+        return f"{name}{{{label_text}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+def _format_value(value):
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+def _escape(text):
+    return text.replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
@@ -0,0 +1,362 @@
+"""
+Precomputed top-K neighbor index for the content-based recommender
+
+Instead of keeping the full N x N cosine similarity matrix in memory, only the
+K most similar movies of every movie are stored (int32 indices + float32 scores).
+"""
+
+import os
+import pickle
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+DEFAULT_K = 20
+# Upper bound on the values of one dense block of similarity rows (128 MB as float64)
+BLOCK_VALUES = 16_000_000
+NEIGHBORS_FILE = "neighbors.pkl"
+SIMILARITY_FILE = "similarity.pkl"
+
+
+class NeighborIndex:
+    """Top-K most similar movies for every movie in the catalog"""
+
+    def __init__(self, indices, scores):
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        if self.indices.shape != self.scores.shape:
+            raise ValueError("indices and scores must have the same shape")
+
+    def __len__(self):
+        return self.indices.shape[0]
+
+    @property
+    def k(self):
+        return self.indices.shape[1]
+
+    def neighbors(self, movie_index, n=5):
+        """Return the indices and scores of the n most similar movies"""
+        if n > self.k:
+            raise ValueError(f"Index only holds {self.k} neighbors per movie, {n} requested")
+        return self.indices[movie_index, :n], self.scores[movie_index, :n]
+
+    def neighbors_batch(self, movie_indices, n=5):
+        """Indices and scores of the n most similar movies of each movie, one row per movie"""
+        if n > self.k:
+            raise ValueError(f"Index only holds {self.k} neighbors per movie, {n} requested")
+        rows = np.asarray(movie_indices, dtype=np.intp)
+        return self.indices[rows, :n], self.scores[rows, :n]
+
+    def neighbors_multi(self, movie_indices, n=5, weights=None):
+        """The n movies most similar to several seed movies together, seeds excluded
+
+        Scores are the weighted mean of the seeds' stored similarities (0 where
+        a movie is not among a seed's top-K), summed with one bincount.
+        """
+        rows, weights = seed_weights(movie_indices, weights)
+        candidates, positions = np.unique(self.indices[rows], return_inverse=True)
+        scores = np.bincount(positions.ravel(), weights=(self.scores[rows] * weights[:, None]).ravel(),
+                             minlength=len(candidates))
+        scores[np.isin(candidates, rows)] = -np.inf
+        positions, values = top_k(scores, n)
+        keep = np.isfinite(values)
+        return candidates[positions[keep]], values[keep]
+
+    def save(self, path=NEIGHBORS_FILE):
+        """Save the index as a pickle file"""
+        with open(path, "wb") as f:
+            pickle.dump({"k": self.k, "indices": self.indices, "scores": self.scores}, f)
+
+    @classmethod
+    def load(cls, path=NEIGHBORS_FILE):
+        """Load an index saved with save()"""
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        return cls(data["indices"], data["scores"])
+
+
+class SparseCosineIndex:
+    """Similarities computed on demand from L2-normalized sparse feature vectors
+
+    Keeps only the CSR bag-of-words matrix (O(nnz) memory) and scores one
+    query with a single sparse matrix-vector product, so the catalog can grow
+    without a quadratic similarity matrix.
+    """
+
+    def __init__(self, vectors, normalized=False):
+        vectors = sparse.csr_matrix(vectors)
+        self.vectors = vectors if normalized else normalize(vectors).astype(np.float32)
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def similarities(self, movie_index):
+        """Cosine similarity of one movie to every movie in the catalog"""
+        query = self.vectors[movie_index].toarray().ravel()
+        return self.vectors @ query
+
+    def neighbors(self, movie_index, n=5):
+        """Return the indices and scores of the n most similar movies"""
+        return top_k(self.similarities(movie_index), n, exclude=movie_index)
+
+    def neighbors_batch(self, movie_indices, n=5, block_size=1024):
+        """Indices and scores of the n most similar movies of each movie, one row per movie
+
+        Scores a block of queries with one sparse matrix product instead of
+        one matrix-vector product per movie; blocks shrink as the catalog grows
+        so one dense block never holds more than BLOCK_VALUES similarities.
+        """
+        rows = np.asarray(movie_indices, dtype=np.intp)
+        block_size = rows_per_block(len(self), block_size)
+        k = max(min(n, len(self) - 1), 0)
+        indices = np.empty((len(rows), k), dtype=np.intp)
+        scores = np.empty((len(rows), k), dtype=np.float64)
+        for start in range(0, len(rows), block_size):
+            block_rows = rows[start:start + block_size]
+            block = (self.vectors[block_rows] @ self.vectors.T).toarray()
+            indices[start:start + len(block_rows)], scores[start:start + len(block_rows)] = \
+                top_k(block, n, exclude=block_rows)
+        return indices, scores
+
+    def neighbors_multi(self, movie_indices, n=5, weights=None):
+        """The n movies most similar to several seed movies together, seeds excluded
+
+        The seeds' vectors are combined into one (weighted) query vector, so any
+        number of seeds costs a single matrix-vector product.
+        """
+        rows, weights = seed_weights(movie_indices, weights)
+        query = seed_query(self.vectors, rows, weights)
+        scores = self.vectors @ query
+        scores[rows] = -np.inf
+        indices, values = top_k(scores, n)
+        keep = np.isfinite(values)
+        return indices[keep], values[keep]
+
+
+class IVFIndex:
+    """Approximate neighbors from an inverted-file (IVF) clustered index
+
+    Movies are grouped into n_lists clusters with spherical k-means over the
+    normalized vectors. A query only scores the movies of the n_probe clusters
+    whose centroids are closest to it, trading a little recall for latency on
+    large catalogs.
+    """
+
+    def __init__(self, vectors, n_lists=None, n_probe=8, n_iter=10, train_size=20000, seed=0,
+                 normalized=False):
+        vectors = sparse.csr_matrix(vectors)
+        self.vectors = vectors if normalized else normalize(vectors).astype(np.float32)
+        n = self.vectors.shape[0]
+        self.n_lists = min(n_lists or max(int(np.sqrt(n)), 1), n)
+        self.n_probe = min(n_probe, self.n_lists)
+
+        rng = np.random.default_rng(seed)
+        sample = self.vectors[rng.choice(n, min(train_size, n), replace=False)]
+        self.centroids = self._train(sample, n_iter, rng)
+
+        # Inverted lists: movie indices grouped by cluster
+        assignment = self._assign(self.vectors)
+        self.list_members = np.argsort(assignment, kind="stable").astype(np.int32)
+        self.list_offsets = np.searchsorted(assignment[self.list_members], np.arange(self.n_lists + 1))
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def _assign(self, vectors, block_size=4096):
+        """Closest centroid of every row"""
+        assignment = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], block_size):
+            scores = vectors[start:start + block_size] @ self.centroids.T
+            assignment[start:start + block_size] = np.asarray(scores).argmax(axis=1)
+        return assignment
+
+    def _train(self, sample, n_iter, rng):
+        """Spherical k-means on a sample of the catalog"""
+        self.centroids = sample[rng.choice(sample.shape[0], self.n_lists, replace=False)].toarray()
+        for _ in range(n_iter):
+            assignment = self._assign(sample)
+            members = sparse.csr_matrix(
+                (np.ones(sample.shape[0], dtype=np.float32), (assignment, np.arange(sample.shape[0]))),
+                shape=(self.n_lists, sample.shape[0]),
+            )
+            sums = np.asarray((members @ sample).todense())
+            # Re-seed empty clusters with random movies
+            empty = np.flatnonzero(np.asarray(members.sum(axis=1)).ravel() == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(sample.shape[0], len(empty))].toarray()
+            self.centroids = normalize(sums).astype(np.float32)
+        return self.centroids
+
+    def candidates(self, query):
+        """Movie indices in the n_probe clusters closest to the query vector"""
+        lists, _ = top_k(self.centroids @ query, self.n_probe)
+        members = [self.list_members[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists]
+        # Sorted so ties are broken by movie index, as in the exact backends
+        return np.sort(np.concatenate(members))
+
+    def neighbors(self, movie_index, n=5):
+        """Return the indices and scores of (approximately) the n most similar movies"""
+        query = self.vectors[movie_index].toarray().ravel()
+        candidates = self.candidates(query)
+        scores = self.vectors[candidates] @ query
+        own_position = np.flatnonzero(candidates == movie_index)
+        positions, values = top_k(scores, n, exclude=own_position[0] if len(own_position) else None)
+        return candidates[positions], values
+
+    def neighbors_batch(self, movie_indices, n=5):
+        """Indices and scores of the n most similar movies of each movie, one row per movie"""
+        # Each query probes its own clusters, so candidates are not shared
+        results = [self.neighbors(movie_index, n) for movie_index in movie_indices]
+        k = max(min(n, len(self) - 1), 0)
+        indices = np.full((len(results), k), -1, dtype=np.intp)
+        scores = np.full((len(results), k), -np.inf)
+        for row, (found, values) in enumerate(results):
+            indices[row, :len(found)], scores[row, :len(values)] = found, values
+        return indices, scores
+
+    def neighbors_multi(self, movie_indices, n=5, weights=None):
+        """(Approximately) the n movies most similar to several seed movies together, seeds excluded"""
+        rows, weights = seed_weights(movie_indices, weights)
+        query = seed_query(self.vectors, rows, weights)
+        candidates = self.candidates(query)
+        scores = self.vectors[candidates] @ query
+        scores[np.isin(candidates, rows)] = -np.inf
+        positions, values = top_k(scores, n)
+        keep = np.isfinite(values)
+        return candidates[positions[keep]], values[keep]
+
+
+# Neighbor-search backends that work from the sparse feature vectors
+VECTOR_BACKENDS = {
+    "sparse": SparseCosineIndex,
+    "ivf": IVFIndex,
+}
+
+
+def make_backend(name, vectors, normalized=False, **options):
+    """Create the neighbor-search backend registered under name"""
+    try:
+        backend = VECTOR_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown neighbor backend {name!r}, expected one of {sorted(VECTOR_BACKENDS)}")
+    return backend(vectors, normalized=normalized, **options)
+
+
+def seed_weights(movie_indices, weights=None):
+    """Seed rows and their weights normalized to sum to 1 (equal weights by default)"""
+    rows = np.asarray(movie_indices, dtype=np.intp).reshape(-1)
+    if len(rows) == 0:
+        raise ValueError("At least one seed movie is required")
+    weights = np.ones(len(rows)) if weights is None else np.asarray(weights, dtype=np.float64).reshape(-1)
+    if weights.shape != rows.shape:
+        raise ValueError(f"Got {len(weights)} weights for {len(rows)} seed movies")
+    if np.any(weights < 0) or not np.isfinite(weights).all() or weights.sum() == 0:
+        raise ValueError("Weights must be finite, non-negative and not all zero")
+    return rows, weights / weights.sum()
+
+
+def seed_query(vectors, rows, weights):
+    """Unit-length weighted sum of the seeds' (normalized) vectors"""
+    query = np.asarray(vectors[rows].T @ weights, dtype=np.float32).ravel()
+    norm = np.linalg.norm(query)
+    return query / norm if norm else query
+
+
+def top_k(scores, k, exclude=None):
+    """Return the indices and values of the k highest scores, best first
+
+    Works on a single row of scores or on a 2-D block (one row per query).
+    ``exclude`` is the column to skip in each row (e.g. the query movie itself),
+    given as an int or as one int per row. The cut-off score is found in O(N)
+    with np.partition and only the entries at or above it are sorted. Ties are
+    broken by the lower index, like the original stable sort.
+    """
+    scores = np.asarray(scores)
+    single = scores.ndim == 1
+    block = np.atleast_2d(scores)
+    n_rows, n = block.shape
+
+    skip = 0 if exclude is None else 1
+    k = max(min(k, n - skip), 0)
+    m = min(k + skip, n)
+    if k == 0:
+        empty = np.empty((n_rows, 0))
+        return (empty[0].astype(np.intp), empty[0]) if single else (empty.astype(np.intp), empty)
+
+    # Score of the m-th best entry in each row
+    cutoff = np.partition(block, n - m, axis=1)[:, n - m]
+    rows, columns = np.nonzero(block >= cutoff[:, None])
+    values = block[rows, columns].astype(np.float64)
+
+    if exclude is not None:
+        excluded = np.broadcast_to(np.asarray(exclude).reshape(-1), (n_rows,))
+        values[columns == excluded[rows]] = -np.inf
+
+    # Every row has at least m candidates; keep the best k of each
+    order = np.lexsort((columns, -values, rows))
+    rows, columns, values = rows[order], columns[order], values[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    keep = rank < k
+    indices = columns[keep].reshape(n_rows, k)
+    values = values[keep].reshape(n_rows, k)
+
+    if single:
+        return indices[0], values[0]
+    return indices, values
+
+
+def rows_per_block(n, block_size):
+    """Rows per dense block of similarities against n movies: at most block_size, within BLOCK_VALUES"""
+    return max(1, min(block_size, BLOCK_VALUES // max(n, 1)))
+
+
+def build_neighbor_index(similarity, k=DEFAULT_K, block_size=1024):
+    """Reduce a dense similarity matrix to the top-k neighbors of every movie"""
+    n = similarity.shape[0]
+    k = min(k, n - 1)
+    indices = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+
+    # Work through the matrix in row blocks so we never copy all of it at once
+    for start in range(0, n, block_size):
+        block = similarity[start:start + block_size]
+        rows = np.arange(start, start + block.shape[0])
+        # A movie is never its own recommendation
+        indices[rows], scores[rows] = top_k(block, k, exclude=rows)
+
+    return NeighborIndex(indices, scores)
+
+
+def build_neighbor_index_from_vectors(vectors, k=DEFAULT_K, block_size=1024):
+    """Top-k cosine neighbors of every row of a (sparse) feature matrix
+
+    Equivalent to build_neighbor_index(cosine_similarity(vectors)) but only one
+    block of similarity rows exists at a time, so memory stays O(block_size x N)
+    and within BLOCK_VALUES.
+    """
+    normalized = normalize(vectors)
+    n = normalized.shape[0]
+    block_size = rows_per_block(n, block_size)
+    k = min(k, n - 1)
+    indices = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+
+    for start in range(0, n, block_size):
+        block = normalized[start:start + block_size] @ normalized.T
+        if sparse.issparse(block):
+            block = block.toarray()
+        rows = np.arange(start, start + block.shape[0])
+        indices[rows], scores[rows] = top_k(block, k, exclude=rows)
+
+    return NeighborIndex(indices, scores)
+
+
+def load_neighbor_index(neighbors_path=NEIGHBORS_FILE, similarity_path=SIMILARITY_FILE, k=DEFAULT_K):
+    """Load the neighbor index, deriving it from similarity.pkl if it has not been built yet"""
+    if os.path.exists(neighbors_path):
+        return NeighborIndex.load(neighbors_path)
+
+    with open(similarity_path, "rb") as f:
+        similarity = pickle.load(f)
+    return build_neighbor_index(similarity, k=k)
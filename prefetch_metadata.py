@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Fill the on-disk metadata store for the whole movie catalog
+
+Fetches every movie that is not stored yet from TMDB, a few at a time and
+below the given request rate, so the servers can run without network access.
+
+Usage:
+    python prefetch_metadata.py [--db metadata.db] [--rate 20] [--workers 4] [--refresh]
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from artifacts import ARTIFACTS_DIR, load_model
+from metadata_store import METADATA_DB, MetadataStore
+from tmdb_client import TMDBClient
+
+
+class RateLimiter:
+    """Spaces calls at least 1 / rate seconds apart across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def prefetch(client, movie_ids, rate=20, workers=4, progress_every=100):
+    """Fetch movie_ids into the client's store, returning (fetched, failed)"""
+    limiter = RateLimiter(rate)
+    counts = {"fetched": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def fetch_one(movie_id):
+        limiter.wait()
+        ok = client.fetch(movie_id) is not None
+        with lock:
+            counts["fetched" if ok else "failed"] += 1
+            done = counts["fetched"] + counts["failed"]
+        if done % progress_every == 0:
+            print(f"   {done}/{len(movie_ids)} movies ({counts['failed']} failed)")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(fetch_one, movie_ids))
+    return counts["fetched"], counts["failed"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch TMDB metadata for the movie catalog")
+    parser.add_argument("--db", default=METADATA_DB, help="SQLite metadata store to fill")
+    parser.add_argument("--artifacts", default=ARTIFACTS_DIR)
+    parser.add_argument("--rate", type=float, default=20, help="maximum TMDB requests per second")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent TMDB requests")
+    parser.add_argument("--refresh", action="store_true", help="refetch movies that are already stored")
+    args = parser.parse_args(argv)
+
+    movies_df, _ = load_model(args.artifacts)
+    store = MetadataStore(args.db)
+    client = TMDBClient(timeout=10, store=store)
+
+    movie_ids = [int(movie_id) for movie_id in movies_df["movie_id"]]
+    if not args.refresh:
+        movie_ids = store.missing(movie_ids)
+    print(f"🎬 {len(movies_df)} movies in catalog, {len(movie_ids)} to fetch into {args.db}")
+
+    start = time.perf_counter()
+    fetched, failed = prefetch(client, movie_ids, rate=args.rate, workers=args.workers)
+    print(f"✅ Fetched {fetched} movies ({failed} failed) in {time.perf_counter() - start:.1f}s, "
+          f"{len(store)} stored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Recommendations for one or many seed movies from a loaded model
+
+Seeds are titles or TMDB movie IDs. A batch is resolved in one pass, the
+neighbors of all distinct seeds come from a single backend call and TMDB
+metadata is only fetched when asked for.
+"""
+
+import numpy as np
+
+from cache import TTLCache
+from tmdb_client import movie_details, poster_url
+from title_index import TitleIndex
+
+
+class Recommender:
+    """The loaded catalog, its neighbor backend and the title/ID lookups
+
+    cache holds responses computed from this model; it is dropped together
+    with the model when a new one is loaded.
+    """
+
+    def __init__(self, movies_df, neighbor_index, title_index=None, cache_size=1024, cache_ttl=None):
+        self.movies_df = movies_df
+        self.neighbor_index = neighbor_index
+        self.title_index = title_index if title_index is not None else TitleIndex(movies_df['title'])
+        self.titles = movies_df['title'].to_numpy(dtype=object)
+        self.movie_ids = movies_df['movie_id'].to_numpy(dtype=np.int64)
+        # Like titles, a duplicated movie_id resolves to its first row
+        self.rows_by_id = {}
+        for row, movie_id in enumerate(self.movie_ids.tolist()):
+            self.rows_by_id.setdefault(movie_id, row)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    def resolve(self, seed, partial=True):
+        """Row of a seed (int movie ID or title), or None"""
+        if isinstance(seed, (int, np.integer)) and not isinstance(seed, bool):
+            return self.rows_by_id.get(int(seed))
+        if isinstance(seed, str):
+            return self.title_index.resolve(seed, partial=partial)
+        return None
+
+    def resolve_many(self, seeds, partial=False):
+        """Rows of several seeds, None for the ones not in the catalog"""
+        return [self.resolve(seed, partial=partial) for seed in seeds]
+
+    def neighbors(self, rows, n=5):
+        """Indices and scores of the n nearest movies of every row, in one backend call"""
+        unique_rows, inverse = np.unique(np.asarray(rows, dtype=np.intp), return_inverse=True)
+        indices, scores = self.neighbor_index.neighbors_batch(unique_rows, n)
+        return np.asarray(indices)[inverse], np.asarray(scores)[inverse]
+
+    def recommend_rows(self, rows, n=5):
+        """The movie and its n recommendations (IDs, titles, scores) for each row, None for None rows"""
+        found = [position for position, row in enumerate(rows) if row is not None]
+        results = [None] * len(rows)
+        if not found:
+            return results
+
+        indices, scores = self.neighbors([rows[position] for position in found], n)
+        for position, row_indices, row_scores in zip(found, indices, scores):
+            results[position] = self.recommendation(rows[position], row_indices, row_scores)
+        return results
+
+    def recommendation(self, row, row_indices, row_scores):
+        """The movie of row and its neighbors (IDs, titles, scores) as returned by the API"""
+        # Approximate backends pad rows that found fewer than n neighbors with -1
+        keep = row_indices >= 0
+        row_indices, row_scores = row_indices[keep], row_scores[keep]
+        return {
+            'input_movie': self.titles[row],
+            'movie_id': int(self.movie_ids[row]),
+            'recommendations': [
+                {'title': title, 'movie_id': movie_id, 'similarity_score': score}
+                for title, movie_id, score in zip(self.titles[row_indices].tolist(),
+                                                  self.movie_ids[row_indices].tolist(),
+                                                  row_scores.astype(float).tolist())
+            ]
+        }
+
+    def recommend_batch(self, seeds, n=5, partial=False):
+        """One result per seed (title or movie ID), tagged with the seed as 'input'
+
+        Seeds that are not in the catalog get {'input': seed, 'error': ...}.
+        """
+        results = self.recommend_rows(self.resolve_many(seeds, partial=partial), n)
+        return [{'input': seed, **result} if result is not None else {'input': seed, 'error': 'Movie not found'}
+                for seed, result in zip(seeds, results)]
+
+    def recommend_multi(self, seeds, weights=None, n=5, partial=False):
+        """n recommendations for several seeds together ("more like these"), seeds excluded
+
+        weights (one per seed, default equal) are relative; seeds not in the
+        catalog are reported in 'not_found' and their weights dropped.
+        """
+        rows = self.resolve_many(seeds, partial=partial)
+        if weights is not None and len(weights) != len(seeds):
+            raise ValueError(f"Got {len(weights)} weights for {len(seeds)} seed movies")
+        found = [position for position, row in enumerate(rows) if row is not None]
+        result = {
+            'input_movies': [self.titles[rows[position]] for position in found],
+            'not_found': [seeds[position] for position, row in enumerate(rows) if row is None],
+            'recommendations': []
+        }
+        if not found:
+            return result
+
+        seed_rows = [rows[position] for position in found]
+        seed_weights = None if weights is None else [weights[position] for position in found]
+        indices, scores = self.neighbor_index.neighbors_multi(seed_rows, n, weights=seed_weights)
+        result['recommendations'] = [
+            {'title': title, 'movie_id': movie_id, 'similarity_score': score}
+            for title, movie_id, score in zip(self.titles[indices].tolist(), self.movie_ids[indices].tolist(),
+                                              np.asarray(scores, dtype=float).tolist())
+        ]
+        return result
+
+
+def enrich(recommendations, tmdb, deadline=None, **details_options):
+    """Add poster and details to recommendation dicts in place
+
+    Metadata of every distinct movie is fetched in one concurrent call;
+    details_options are passed on to movie_details.
+    Returns True when some lookups missed the deadline (partial metadata).
+    """
+    movie_ids = {recommendation['movie_id'] for recommendation in recommendations}
+    metadata_by_id = tmdb.get_movies(movie_ids, deadline=deadline)
+    return apply_metadata(recommendations, metadata_by_id, **details_options)
+
+
+def apply_metadata(recommendations, metadata_by_id, **details_options):
+    """Add poster and details from already fetched metadata, True when some movies are missing"""
+    for recommendation in recommendations:
+        # One TMDB lookup feeds both the poster and the details
+        metadata = metadata_by_id.get(recommendation['movie_id'])
+        recommendation['poster_url'] = poster_url(metadata)
+        recommendation.update(movie_details(metadata, **details_options))
+    return any(recommendation['movie_id'] not in metadata_by_id for recommendation in recommendations)
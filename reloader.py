@@ -0,0 +1,111 @@
+"""
+Hot reload of the served model when a new artifact version is published
+
+The servers read ModelReloader.current once per request. A reload builds
+the next model in a background thread and then replaces that reference in a
+single assignment, so requests already running finish on the version they
+started with and no request ever sees a half-loaded model.
+"""
+
+import threading
+import time
+
+from artifacts import ARTIFACTS_DIR, artifact_version, resolve_artifact_dir
+
+
+class ModelReloader:
+    """Holds the current model and swaps in newly published versions
+
+    load(artifact_dir) must return a complete model; artifact_dir is the
+    version directory to load, or the root when nothing is published yet.
+    """
+
+    def __init__(self, load, path=ARTIFACTS_DIR):
+        self.path = path
+        self._load = load
+        self._reload_lock = threading.Lock()
+        self._thread = None
+        self.version, self.current = self._load_published()
+        self.loaded_at = time.time()
+        self.last_error = None
+        # What was published when the last reload failed; check() skips it
+        self._failed = None
+
+    def reload(self, wait=False):
+        """Load the published version in the background
+
+        Returns False when a reload is already running. With wait=True the
+        call blocks until the new (or the already running) reload is done.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            thread = self._thread
+            if wait and thread is not None:
+                thread.join()
+            return False
+        self._thread = threading.Thread(target=self._reload, name="model-reload", daemon=True)
+        self._thread.start()
+        if wait:
+            self._thread.join()
+        return True
+
+    def _reload(self):
+        published = self._published()
+        try:
+            version, model = self._load_published()
+            self.current = model
+            self.version = version
+            self.loaded_at = time.time()
+            self.last_error = None
+            self._failed = None
+            print(f"✅ Model version {version} loaded")
+        except Exception as e:
+            # Keep serving the old model
+            self.last_error = str(e)
+            self._failed = published
+            print(f"❌ Model reload failed, still serving version {self.version}: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def _load_published(self):
+        # Pin the version directory so a publish during loading can't mix versions
+        directory = resolve_artifact_dir(self.path)
+        if directory is None:
+            return None, self._load(self.path)
+        return artifact_version(directory), self._load(directory)
+
+    def _published(self):
+        # The version directory CURRENT points at and its manifest version
+        # (None when unreadable), so a broken publish is told apart from the next one
+        directory = resolve_artifact_dir(self.path)
+        return directory, artifact_version(directory) if directory is not None else None
+
+    def check(self):
+        """Start a reload when a different version has been published
+
+        A version that failed to load is not retried until CURRENT changes;
+        reload() (the admin endpoint) always tries again.
+        """
+        published = self._published()
+        if published[1] != self.version and published != self._failed:
+            return self.reload()
+        return False
+
+    def watch(self, interval=10):
+        """Poll for newly published versions every interval seconds in a daemon thread"""
+        def poll():
+            while True:
+                time.sleep(interval)
+                self.check()
+
+        thread = threading.Thread(target=poll, name="model-watch", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        """Version being served and the outcome of the last reload"""
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "reloading": self._reload_lock.locked(),
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,120 @@
+"""
+Structured, sampled request logging for the API servers
+
+Request handlers only put a record on an in-memory queue (QueueHandler); a
+background QueueListener thread formats it as one JSON object per line and
+writes it to stderr. When the queue is full the record is dropped instead of
+making the request wait. Successful fast requests are sampled
+(LOG_SAMPLE_RATE), server errors and slow requests are always logged.
+Headers and bodies are never logged.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from metrics import observe_dropped_log
+
+# Fraction of successful, fast requests that are logged
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 0.01))
+# Requests at least this slow are always logged (milliseconds)
+LOG_SLOW_MS = float(os.environ.get("LOG_SLOW_MS", 1000))
+# Records waiting for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = 10000
+
+logger = logging.getLogger("movie_api.requests")
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, message and the record's fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that counts and drops records when the queue is full
+
+    Drops are also counted in request_logs_dropped_total on /metrics.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            observe_dropped_log()
+
+
+_listener = None
+
+
+def setup_logging(stream=None):
+    """Route request logs through a queue to a writer thread (call once per process, after fork)"""
+    global _listener
+    stop_logging()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter())
+    _listener = QueueListener(log_queue, output)
+    _listener.start()
+
+    handler = DroppingQueueHandler(log_queue)
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return handler
+
+
+@atexit.register
+def stop_logging():
+    """Write out the queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_request(method, route, path, status, seconds):
+    """Log one served request if it is an error, slow, or sampled"""
+    duration_ms = seconds * 1000
+    if status >= 500:
+        level = logging.ERROR
+    elif duration_ms >= LOG_SLOW_MS:
+        level = logging.WARNING
+    elif random.random() < LOG_SAMPLE_RATE:
+        level = logging.INFO
+    else:
+        return
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, "request", extra={"fields": {
+        "method": method,
+        "route": route,
+        "path": path,
+        "status": status,
+        "duration_ms": round(duration_ms, 2),
+        "sampled": level == logging.INFO,
+    }})
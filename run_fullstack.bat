@@ -11,7 +11,7 @@ echo Server will be available at: http://localhost:5000
 echo Flutter Android Emulator should use: http://10.0.2.2:5000
 echo.
 
-start "Flask API" python flask_api.py
+start "Flask API" python wsgi.py
 
 echo.
 echo 📱 Now you can run the Flutter app:
@@ -0,0 +1,295 @@
+"""
+Framework-independent parts of the API servers
+
+flask_api.py (WSGI) and async_api.py (ASGI) expose the same routes. The
+served model bundle, request parsing and response payloads live here so
+both behave identically; parse errors are raised as ValueError carrying the
+message returned to the client with a 400.
+"""
+
+import base64
+import os
+
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+from artifacts import load_model
+from cache import TTLCache
+from http_cache import PrecomputedResponse
+from neighbors import SparseCosineIndex
+from recommender import Recommender
+from title_index import SearchIndex
+
+# /recommend response cache: entries per (movie, K, enrichment), optional expiry in seconds
+RECOMMEND_CACHE_SIZE = int(os.environ.get("RECOMMEND_CACHE_SIZE", 1024))
+RECOMMEND_CACHE_TTL = float(os.environ.get("RECOMMEND_CACHE_TTL", 3600)) or None
+
+# Seconds between checks for a newly published artifact version (0 disables the watcher)
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", 10))
+# Bearer token for POST /admin/reload; the endpoint is disabled when unset
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Overall time budget for the TMDB lookups of one /recommend request (seconds)
+METADATA_DEADLINE = float(os.environ.get("METADATA_DEADLINE", 5))
+
+RECOMMEND_K = 5
+SEARCH_MAX_LIMIT = 100
+MOVIES_MAX_LIMIT = 1000
+
+# Limits of one /recommend/batch request
+BATCH_MAX_SEEDS = 10000
+BATCH_MAX_K = 20
+
+# Favorites combined by one /recommend/multi request
+MULTI_MAX_SEEDS = 100
+
+
+def load_from_csv():
+    """Movies and sparse-vector backend built from the raw TMDB CSV files"""
+    movies = pd.read_csv("tmdb_5000_movies.csv")
+    credits = pd.read_csv("tmdb_5000_credits.csv")
+
+    # Merge datasets
+    movies = movies.merge(credits, on='title')
+    movies_df = movies[['movie_id', 'title', 'overview', 'genres', 'keywords', 'cast', 'crew']].dropna()
+
+    # Preprocessing function
+    def preprocess_text(data):
+        return str(data['genres']) + " " + str(data['keywords']) + " " + str(data['cast']) + " " + str(data['crew'])
+
+    movies_df['tags'] = movies_df.apply(preprocess_text, axis=1)
+
+    # Text vectorization; similarities are computed per request from the sparse vectors
+    vectorizer = CountVectorizer(max_features=5000, stop_words='english')
+    vectors = vectorizer.fit_transform(movies_df['tags'])
+    return movies_df.reset_index(drop=True), SparseCosineIndex(vectors)
+
+
+class ServedModel:
+    """Everything the endpoints serve from one model version, built before it is swapped in"""
+
+    def __init__(self, movies_df, neighbor_index):
+        self.movies_df = movies_df
+        # Normalized title -> row lookup and ranked search index
+        # Caches the first 10 pages of the largest /search page per query
+        self.title_index = SearchIndex(movies_df['title'], cached_rows=10 * SEARCH_MAX_LIMIT)
+        self.recommender = Recommender(movies_df, neighbor_index, self.title_index,
+                                       cache_size=RECOMMEND_CACHE_SIZE, cache_ttl=RECOMMEND_CACHE_TTL)
+
+        # /movies catalog: the full response is serialized and compressed once here,
+        # pages are built on first request and kept in a bounded cache
+        self.movies_fields = {
+            'movie_id': [int(movie_id) for movie_id in movies_df['movie_id']],
+            'title': movies_df['title'].tolist()
+        }
+        self.movies_response = PrecomputedResponse({
+            'movies': self.movies_fields['title'],
+            'count': len(self.movies_fields['title'])
+        })
+        self.movies_pages = TTLCache(maxsize=256)
+
+    def movies_page(self, offset, limit, fields):
+        """Precomputed response for one page of the catalog"""
+        key = (offset, limit, fields)
+        page = self.movies_pages.get(key)
+        if page is None:
+            total = len(self.movies_fields['title'])
+            stop = min(offset + limit, total)
+            if fields:
+                columns = [self.movies_fields[field][offset:stop] for field in fields]
+                movies_list = [dict(zip(fields, values)) for values in zip(*columns)]
+            else:
+                # Without field selection items stay plain titles, like the full list
+                movies_list = self.movies_fields['title'][offset:stop]
+            page = PrecomputedResponse({
+                'movies': movies_list,
+                'count': len(movies_list),
+                'total': total,
+                'next_cursor': encode_cursor(stop) if stop < total else None
+            })
+            self.movies_pages.set(key, page)
+        return page
+
+    def movies_response_for(self, args):
+        """Precomputed /movies response for the query parameters (full list or one page)"""
+        if not any(name in args for name in ('cursor', 'limit', 'fields')):
+            # Unchanged full title list, served from the precomputed body
+            return self.movies_response
+
+        try:
+            limit = min(int(args.get('limit', MOVIES_MAX_LIMIT)), MOVIES_MAX_LIMIT)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        offset = decode_cursor(args['cursor']) if args.get('cursor') else 0
+        if limit <= 0:
+            raise ValueError('limit must be positive')
+
+        fields = tuple(field.strip() for field in args.get('fields', '').split(',') if field.strip())
+        unknown = [field for field in fields if field not in self.movies_fields]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+        return self.movies_page(offset, limit, fields)
+
+    def search(self, args):
+        """/search payload for the query parameters"""
+        query = args.get('q', '').strip()
+        if not query:
+            raise ValueError('Query parameter is required')
+        try:
+            limit = min(int(args.get('limit', 20)), SEARCH_MAX_LIMIT)
+            offset = int(args.get('offset', 0))
+        except ValueError:
+            raise ValueError('limit and offset must be integers')
+        if limit < 0 or offset < 0:
+            raise ValueError('limit and offset must not be negative')
+
+        rows, total = self.title_index.search(query, limit=limit, offset=offset)
+        movies_list = self.movies_df['title'].iloc[rows].tolist()
+        return {
+            'movies': movies_list,
+            'count': len(movies_list),
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'query': query
+        }
+
+
+def load_served_model(artifacts_dir):
+    """Load the memory-mapped artifacts (or the legacy pickle files, or the CSVs)"""
+    try:
+        # Only the top-K neighbors of each movie are kept, shared between workers via mmap
+        movies_df, neighbor_index = load_model(artifacts_dir)
+        print(f"✅ Loaded model artifacts ({type(neighbor_index).__name__} backend)")
+    except FileNotFoundError:
+        print("⚠️ Model artifacts not found, loading from CSV...")
+        movies_df, neighbor_index = load_from_csv()
+        print("✅ Generated sparse vectors from CSV")
+    return ServedModel(movies_df, neighbor_index)
+
+
+def encode_cursor(offset):
+    """Opaque pagination cursor for a catalog offset"""
+    return base64.urlsafe_b64encode(str(offset).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Catalog offset of a cursor, ValueError when it is not one of ours"""
+    try:
+        offset = int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f'Invalid cursor "{cursor}"')
+    if offset < 0:
+        raise ValueError(f'Invalid cursor "{cursor}"')
+    return offset
+
+
+def recommend_row(recommender, row, timer):
+    """The RECOMMEND_K recommendations of one row, timing neighbor search and row materialization"""
+    with timer.stage('neighbors'):
+        indices, scores = recommender.neighbors([row], RECOMMEND_K)
+    with timer.stage('rows'):
+        return recommender.recommendation(row, indices[0], scores[0])
+
+
+def recommend_payload(result, partial):
+    """/recommend response for a recommend_rows result with metadata attached"""
+    return {
+        'input_movie': result['input_movie'],
+        'recommendations': result['recommendations'],
+        'count': len(result['recommendations']),
+        'partial': partial
+    }
+
+
+def cache_recommendation(recommender, key, response, tmdb):
+    """Keep a /recommend response in the model's response cache
+
+    Responses still waiting for metadata are not cached, so the next request
+    can complete them; ones with failed lookups only for as long as the TMDB
+    client remembers failures.
+    """
+    if response['partial']:
+        return
+    failed = any(tmdb.cache.get(r['movie_id'], count=False) is None for r in response['recommendations'])
+    recommender.cache.set(key, response, ttl=tmdb.failure_ttl if failed else None)
+
+
+def parse_batch(data):
+    """(seeds, k, partial, enrich) of a /recommend/batch request body"""
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    titles, movie_ids = data.get('titles') or [], data.get('movie_ids') or []
+    if not isinstance(titles, list) or not isinstance(movie_ids, list):
+        raise ValueError('titles and movie_ids must be lists')
+    # Seeds are told apart by type, so an ID among the titles (or a title among
+    # the IDs) would silently be looked up as the other kind
+    if not all(isinstance(title, str) and title for title in titles):
+        raise ValueError('titles must be non-empty strings')
+    if not all(isinstance(movie_id, int) and not isinstance(movie_id, bool) for movie_id in movie_ids):
+        raise ValueError('movie_ids must be integers')
+    seeds = titles + movie_ids
+
+    if not seeds:
+        raise ValueError('titles or movie_ids are required')
+    if len(seeds) > BATCH_MAX_SEEDS:
+        raise ValueError(f'At most {BATCH_MAX_SEEDS} movies per batch')
+    try:
+        k = int(data.get('k', 5))
+    except (TypeError, ValueError):
+        raise ValueError('k must be an integer')
+    if not 0 < k <= BATCH_MAX_K:
+        raise ValueError(f'k must be between 1 and {BATCH_MAX_K}')
+    # Exact title matches only by default: a partial match scans the catalog per seed
+    return seeds, k, bool(data.get('partial', False)), bool(data.get('enrich', False))
+
+
+def batch_payload(results, partial):
+    """/recommend/batch response"""
+    return {
+        'results': results,
+        'count': len(results),
+        'not_found': sum('error' in result for result in results),
+        'partial': partial
+    }
+
+
+def batch_recommendations(results):
+    """Every recommendation dict of a batch, for enrichment in one call"""
+    return [recommendation for result in results for recommendation in result.get('recommendations', [])]
+
+
+def parse_multi(data):
+    """(titles, weights) of a /recommend/multi request body, weights None when not given"""
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    titles, weights = data.get('titles'), data.get('weights')
+    if not isinstance(titles, list) or not titles:
+        raise ValueError('titles must be a non-empty list')
+    if len(titles) > MULTI_MAX_SEEDS:
+        raise ValueError(f'At most {MULTI_MAX_SEEDS} movies per request')
+    if not all(isinstance(title, str) and title for title in titles):
+        raise ValueError('titles must be non-empty strings')
+    if weights is not None:
+        if not isinstance(weights, list) or len(weights) != len(titles):
+            raise ValueError('weights must be a list with one weight per title')
+        if not all(isinstance(weight, (int, float)) and not isinstance(weight, bool) and weight >= 0
+                   for weight in weights) or not any(weights):
+            raise ValueError('weights must be non-negative numbers, not all zero')
+    return titles, weights
+
+
+def multi_cache_key(titles, weights):
+    """Response cache key of a /recommend/multi request"""
+    return 'multi', tuple(titles), None if weights is None else tuple(weights)
+
+
+def multi_payload(result, partial):
+    """/recommend/multi response for a recommend_multi result with metadata attached"""
+    return {
+        'input_movies': result['input_movies'],
+        'not_found': result['not_found'],
+        'recommendations': result['recommendations'],
+        'count': len(result['recommendations']),
+        'partial': partial
+    }
@@ -12,5 +12,5 @@ echo ⚠️  For emulator, use http://10.0.2.2:5000
 echo ⚠️  For physical device, use http://192.168.1.4:5000
 echo.
 echo 🔧 Starting Flask server...
-python flask_api.py
+python wsgi.py
 pause
@@ -0,0 +1,55 @@
+"""
+Tests for the recommendation API client used by the Streamlit app in API mode
+"""
+
+import pytest
+
+from api_client import APIError, RecommenderAPIClient
+
+
+def answer_api(server, method, path, body):
+    if path.startswith("/movies"):
+        return 200, {"movies": ["Avatar", "Titanic"], "count": 2}
+    if path.startswith("/search"):
+        return 200, {"movies": ["Avatar"], "count": 1, "total": 1}
+    if path == "/recommend" and body["title"] == "Avatar":
+        return 200, {"recommendations": [{"title": "Aliens", "movie_id": 679}], "partial": False}
+    if path == "/recommend/multi":
+        return 200, {"recommendations": [{"title": "Aliens", "movie_id": 679}], "partial": True}
+    return 404, {"error": "Not found"}
+
+
+@pytest.fixture
+def api_server(serve_stub):
+    return serve_stub(answer_api)
+
+
+def make_client(server, **kwargs):
+    return RecommenderAPIClient(f"http://127.0.0.1:{server.server_port}/", **kwargs)
+
+
+def test_complete_answers_are_cached(api_server):
+    client = make_client(api_server)
+    assert client.titles() == ["Avatar", "Titanic"]
+    assert client.search("avat", limit=5) == ["Avatar"]
+    first = client.recommend("Avatar")
+    assert client.recommend("Avatar") is first
+    client.titles()
+    assert api_server.requests == ["/movies", "/search?q=avat&limit=5", "/recommend"]
+    # All over one pooled keep-alive connection
+    assert len(api_server.client_ports) == 1
+
+
+def test_partial_answers_are_asked_again(api_server):
+    client = make_client(api_server)
+    client.recommend_multi(["Avatar", "Titanic"], [1.0, 0.5])
+    client.recommend_multi(["Avatar", "Titanic"], [1.0, 0.5])
+    assert api_server.requests == ["/recommend/multi", "/recommend/multi"]
+    assert api_server.bodies[0] == {"titles": ["Avatar", "Titanic"], "weights": [1.0, 0.5]}
+
+
+def test_missing_movies_and_failures(api_server):
+    client = make_client(api_server)
+    assert client.recommend("Unknown") is None
+    with pytest.raises(APIError):
+        RecommenderAPIClient("http://127.0.0.1:9", timeout=1).recommend("Titanic")
@@ -0,0 +1,51 @@
+"""
+Tests for the memory-mapped model artifacts
+"""
+
+import numpy as np
+
+from scipy import sparse
+
+from artifacts import load_artifacts, load_model, save_artifacts
+from neighbors import SparseCosineIndex, build_neighbor_index, build_neighbor_index_from_vectors
+
+
+def make_index(n=12):
+    rng = np.random.default_rng(0)
+    vectors = rng.random((n, 6))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return build_neighbor_index(vectors @ vectors.T, k=4)
+
+
+def test_artifacts_round_trip_memory_mapped(tmp_path):
+    index = make_index()
+    titles = [f"Movie {i}" for i in range(12)]
+    manifest = save_artifacts(tmp_path, np.arange(100, 112), titles, index, version="test")
+    assert manifest["version"] == "test"
+    assert manifest["count"] == 12 and manifest["k"] == 4
+
+    _, arrays = load_artifacts(tmp_path)
+    assert isinstance(arrays["neighbor_indices"], np.memmap)
+    assert arrays["neighbor_indices"].dtype == np.int32
+    assert arrays["neighbor_scores"].dtype == np.float32
+    assert list(arrays["titles"]) == titles
+
+
+def test_load_model_prefers_artifacts(tmp_path):
+    index = make_index()
+    save_artifacts(tmp_path, np.arange(12), [f"Movie {i}" for i in range(12)], index)
+
+    movies_df, neighbor_index = load_model(tmp_path)
+    assert list(movies_df.columns) == ["movie_id", "title"]
+    assert movies_df.iloc[3]["title"] == "Movie 3"
+    assert np.array_equal(neighbor_index.neighbors(3, 4)[0], index.neighbors(3, 4)[0])
+
+
+def test_load_model_sparse_mode(tmp_path):
+    vectors = sparse.random(12, 30, density=0.3, random_state=1, format="csr")
+    index = build_neighbor_index_from_vectors(vectors, k=4)
+    save_artifacts(tmp_path, np.arange(12), [f"Movie {i}" for i in range(12)], index, vectors=vectors)
+
+    _, neighbor_index = load_model(tmp_path, mode="sparse")
+    assert isinstance(neighbor_index, SparseCosineIndex)
+    assert list(neighbor_index.neighbors(5, 4)[0]) == list(index.neighbors(5, 4)[0])
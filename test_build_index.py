@@ -0,0 +1,53 @@
+"""
+Tests for the offline build pipeline
+"""
+
+import json
+
+import pandas as pd
+
+from artifacts import load_model, read_manifest, resolve_artifact_dir
+from build_index import build_tags, main
+
+
+def write_csvs(path):
+    genres = [[{"id": 1, "name": "Science Fiction"}], [{"id": 2, "name": "Drama"}], [{"id": 1, "name": "Science Fiction"}]]
+    pd.DataFrame({
+        "title": ["Avatar", "Titanic", "Aliens"],
+        "overview": ["Marines on a distant moon", float("nan"), "Marines fight aliens"],
+        "genres": [json.dumps(g) for g in genres],
+        "keywords": [json.dumps([{"id": 3, "name": "space war"}]), "[]", json.dumps([{"id": 3, "name": "space war"}])],
+    }).to_csv(path / "movies.csv", index=False)
+    cast = [{"name": f"Actor {i}"} for i in range(5)]
+    crew = [{"job": "Writer", "name": "Someone"}, {"job": "Director", "name": "James Cameron"}]
+    pd.DataFrame({
+        "movie_id": [19995, 597, 679],
+        "title": ["Avatar", "Titanic", "Aliens"],
+        "cast": [json.dumps(cast)] * 3,
+        "crew": [json.dumps(crew)] * 3,
+    }).to_csv(path / "credits.csv", index=False)
+
+
+def test_build_tags_matches_notebook_features(tmp_path):
+    write_csvs(tmp_path)
+    movies = pd.read_csv(tmp_path / "movies.csv").merge(pd.read_csv(tmp_path / "credits.csv"), on="title")
+    tags = build_tags(movies)
+    assert tags.iloc[0]["tags"] == "marin on a distant moon science_fict space_war actor_0 actor_1 actor_2 james_cameron"
+    assert tags.iloc[1]["tags"] == "drama actor_0 actor_1 actor_2 james_cameron"
+
+
+def test_build_writes_versioned_artifacts(tmp_path):
+    write_csvs(tmp_path)
+    output = tmp_path / "artifacts"
+    for version, jobs in [("v1", "1"), ("v2", "2")]:
+        main(["--movies-csv", str(tmp_path / "movies.csv"), "--credits-csv", str(tmp_path / "credits.csv"),
+              "--output", str(output), "--version", version, "--k", "2", "--jobs", jobs, "--chunk-size", "2"])
+
+    assert resolve_artifact_dir(output) == str(output / "v2")
+    manifest = read_manifest(output / "v2")
+    assert manifest["count"] == 3 and manifest["k"] == 2
+    assert set(manifest["build"]["timings"]) >= {"read", "tags", "vectorize", "neighbors"}
+
+    movies_df, index = load_model(output)
+    assert list(movies_df["title"]) == ["Avatar", "Titanic", "Aliens"]
+    assert movies_df.iloc[int(index.neighbors(0, 1)[0][0])]["title"] == "Aliens"
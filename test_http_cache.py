@@ -0,0 +1,53 @@
+import gzip
+import json
+
+from http_cache import PrecomputedResponse, parse_accept_encoding
+
+PAYLOAD = {"movies": [f"Movie {i}" for i in range(500)], "count": 500}
+
+
+def respond(precomputed, headers=None):
+    headers = headers or {}
+    return precomputed.negotiate(headers.get("Accept-Encoding", ""), headers.get("If-None-Match", ""))
+
+
+def test_identity_body_and_strong_etag():
+    status, body, headers = respond(PrecomputedResponse(PAYLOAD))
+    assert status == 200
+    assert "Content-Encoding" not in headers
+    assert json.loads(body) == PAYLOAD
+    etag = headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert headers["Vary"] == "Accept-Encoding"
+
+
+def test_gzip_negotiated_from_accept_encoding():
+    precomputed = PrecomputedResponse(PAYLOAD)
+    precomputed.variants.pop("br", None)
+    _, body, headers = respond(precomputed, {"Accept-Encoding": "gzip, deflate"})
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == PAYLOAD
+
+    _, _, refused = respond(precomputed, {"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in refused
+
+
+def test_if_none_match_returns_304():
+    precomputed = PrecomputedResponse(PAYLOAD)
+    etag = respond(precomputed, {"Accept-Encoding": "gzip"})[2]["ETag"]
+    status, body, _ = respond(precomputed, {"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert status == 304
+    assert body == b""
+
+    # A different representation has a different strong ETag
+    assert respond(precomputed, {"If-None-Match": etag})[0] == 200
+
+
+def test_small_bodies_are_not_compressed():
+    precomputed = PrecomputedResponse({"movies": [], "count": 0})
+    assert list(precomputed.variants) == ["identity"]
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("br;q=0.5, GZIP, *;q=0") == {"br": 0.5, "gzip": 1.0, "*": 0.0}
+    assert parse_accept_encoding("") == {}
@@ -0,0 +1,113 @@
+"""
+Tests for the Prometheus metrics, stage timing and the sampled request log
+"""
+
+import io
+import json
+import time
+
+import metrics
+import request_log
+from cache import TTLCache
+from metrics import Counter, Histogram
+from timing import StageTimer, parse_server_timing, timing_requested
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        histogram.observe(value, "/recommend")
+    samples = {(name, labels.get("le")): value for name, labels, value in histogram.samples()}
+    assert samples[("latency_seconds_bucket", "0.1")] == 1
+    assert samples[("latency_seconds_bucket", "1")] == 3
+    assert samples[("latency_seconds_bucket", "+Inf")] == 4
+    assert samples[("latency_seconds_count", None)] == 4
+    assert samples[("latency_seconds_sum", None)] == 4.05
+
+
+def test_render_exposition_format():
+    counter = Counter("test_requests_total", "Requests", ("route", "status"))
+    counter.inc("/search", "200")
+    counter.inc("/search", "200")
+    counter.inc('/a"b', "500")
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    metrics.METRICS.append(counter)
+    metrics.register_cache("test", lambda: cache)
+    try:
+        text = metrics.render()
+    finally:
+        metrics.METRICS.remove(counter)
+        del metrics.CACHES.caches["test"]
+
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="/search",status="200"} 2' in text
+    assert 'test_requests_total{route="/a\\"b",status="500"} 1' in text
+    assert 'cache_hits_total{cache="test"} 1' in text
+    assert 'cache_misses_total{cache="test"} 1' in text
+    assert 'cache_entries{cache="test"} 1' in text
+    assert text.endswith("\n")
+
+
+def test_observe_request_and_tmdb():
+    before = metrics.REQUESTS.get("/health", "GET", "200")
+    metrics.observe_request("/health", "GET", 200, 0.002)
+    metrics.observe_tmdb(False, 0.5)
+    assert metrics.REQUESTS.get("/health", "GET", "200") == before + 1
+    assert metrics.REQUEST_LATENCY.count("/health", "GET") >= 1
+    assert metrics.TMDB_REQUESTS.get("error") >= 1
+
+
+def test_request_log_samples_and_always_keeps_errors(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(request_log, "LOG_SAMPLE_RATE", 0)
+    request_log.setup_logging(stream)
+    try:
+        request_log.log_request("GET", "/health", "/health", 200, 0.001)
+        request_log.log_request("POST", "/recommend", "/recommend", 500, 0.01)
+        request_log.log_request("POST", "/recommend", "/recommend", 200, 5.0)
+    finally:
+        request_log.stop_logging()
+
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(entry["status"], entry["level"]) for entry in entries] == [(500, "ERROR"), (200, "WARNING")]
+    assert entries[0]["route"] == "/recommend" and entries[0]["duration_ms"] == 10.0
+    assert "headers" not in entries[0] and "body" not in entries[0]
+
+
+def test_request_log_drops_records_instead_of_blocking(monkeypatch):
+    monkeypatch.setattr(request_log, "LOG_QUEUE_SIZE", 1)
+    monkeypatch.setattr(request_log, "LOG_SAMPLE_RATE", 1)
+    handler = request_log.setup_logging(io.StringIO())
+    # Stop the writer so the queue cannot drain
+    request_log._listener.stop()
+    request_log._listener = None
+    try:
+        dropped_before = metrics.LOGS_DROPPED.get()
+        start = time.perf_counter()
+        for _ in range(100):
+            request_log.log_request("GET", "/health", "/health", 200, 0.001)
+        assert time.perf_counter() - start < 1
+        assert handler.dropped == 99
+        assert metrics.LOGS_DROPPED.get() == dropped_before + 99
+        assert "# TYPE request_logs_dropped_total counter" in metrics.render()
+    finally:
+        request_log.logger.removeHandler(handler)
+
+
+def test_stage_timer_header_round_trip():
+    timer = StageTimer("/test")
+    with timer.stage("resolve"):
+        time.sleep(0.01)
+    with timer.stage("enrich"):
+        pass
+    header = timer.finish()
+    stages = parse_server_timing(header)
+    assert list(stages) == ["resolve", "enrich", "total"]
+    assert stages["resolve"] >= 10 and stages["total"] >= stages["resolve"] + stages["enrich"]
+    assert metrics.STAGE_LATENCY.count("/test", "resolve") == 1
+
+    assert timing_requested({"X-Server-Timing": "1"}) and not timing_requested({})
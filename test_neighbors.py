@@ -0,0 +1,172 @@
+"""
+Tests for the top-K neighbor selection and index
+"""
+
+import numpy as np
+
+from scipy import sparse
+
+import neighbors
+from neighbors import (IVFIndex, NeighborIndex, SparseCosineIndex, build_neighbor_index,
+                       build_neighbor_index_from_vectors, make_backend, top_k)
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(0)
+    scores = rng.random(1000)
+    indices, values = top_k(scores, 5)
+    expected = np.argsort(-scores)[:5]
+    assert list(indices) == list(expected)
+    assert np.allclose(values, scores[expected])
+
+
+def test_top_k_excludes_query_by_index():
+    scores = np.array([1.0, 0.2, 0.9, 1.0, 0.5])
+    indices, _ = top_k(scores, 2, exclude=0)
+    assert list(indices) == [3, 2]
+
+    # The excluded movie does not need to be the best match
+    indices, _ = top_k(scores, 2, exclude=1)
+    assert 1 not in indices and len(indices) == 2
+
+
+def test_top_k_block_excludes_per_row():
+    rng = np.random.default_rng(1)
+    block = rng.random((4, 50))
+    block[np.arange(4), np.arange(4)] = 2.0
+    indices, values = top_k(block, 3, exclude=np.arange(4))
+    for row in range(4):
+        assert row not in indices[row]
+        assert list(values[row]) == sorted(values[row], reverse=True)
+
+
+def test_top_k_clamps_k_to_catalog_size():
+    indices, _ = top_k(np.array([0.3, 0.1, 0.2]), 10, exclude=2)
+    assert list(indices) == [0, 1]
+
+
+def test_build_neighbor_index_round_trip(tmp_path):
+    rng = np.random.default_rng(2)
+    vectors = rng.random((30, 8))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarity = vectors @ vectors.T
+
+    index = build_neighbor_index(similarity, k=5, block_size=7)
+    for row in range(30):
+        expected = [i for i in np.argsort(-similarity[row], kind="stable") if i != row][:5]
+        assert list(index.neighbors(row, 5)[0]) == expected
+
+    path = tmp_path / "neighbors.pkl"
+    index.save(path)
+    loaded = NeighborIndex.load(path)
+    assert loaded.k == 5
+    assert np.array_equal(loaded.indices, index.indices)
+
+
+def test_top_k_breaks_ties_by_lower_index():
+    scores = np.array([0.5, 0.1, 0.3, 0.5, 0.3, 0.3, 0.0])
+    indices, _ = top_k(scores, 4, exclude=0)
+    expected = [i for i, _ in sorted(enumerate(scores), reverse=True, key=lambda x: x[1]) if i != 0][:4]
+    assert list(indices) == expected == [3, 2, 4, 5]
+
+
+def test_sparse_index_matches_precomputed_neighbors():
+    vectors = sparse.random(200, 50, density=0.2, random_state=3, format="csr")
+    precomputed = build_neighbor_index_from_vectors(vectors, k=5, block_size=64)
+    on_demand = SparseCosineIndex(vectors)
+    for row in range(0, 200, 7):
+        indices, scores = on_demand.neighbors(row, 5)
+        assert list(indices) == list(precomputed.neighbors(row, 5)[0])
+        assert np.allclose(scores, precomputed.neighbors(row, 5)[1], atol=1e-5)
+
+
+def test_ivf_index_probing_every_list_is_exact():
+    vectors = sparse.random(300, 40, density=0.15, random_state=4, format="csr")
+    exact = SparseCosineIndex(vectors)
+    ivf = IVFIndex(vectors, n_lists=10, n_probe=10)
+    assert sorted(ivf.list_members) == list(range(300))
+    for row in range(0, 300, 11):
+        indices, _ = ivf.neighbors(row, 5)
+        assert row not in indices
+        assert list(indices) == list(exact.neighbors(row, 5)[0])
+
+
+def test_make_backend_rejects_unknown_names():
+    vectors = sparse.random(20, 10, density=0.5, random_state=5, format="csr")
+    assert isinstance(make_backend("ivf", vectors, n_lists=4), IVFIndex)
+    try:
+        make_backend("annoy", vectors)
+    except ValueError as e:
+        assert "annoy" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_neighbors_batch_matches_single_queries():
+    vectors = sparse.random(60, 40, density=0.2, random_state=7, format="csr")
+    rows = [3, 0, 3, 59]
+    for backend in (SparseCosineIndex(vectors), IVFIndex(vectors, n_lists=4, n_probe=4),
+                    build_neighbor_index_from_vectors(vectors, k=6)):
+        indices, scores = backend.neighbors_batch(rows, 5)
+        assert indices.shape == (4, 5)
+        for row, row_indices, row_scores in zip(rows, indices, scores):
+            expected_indices, expected_scores = backend.neighbors(row, 5)
+            assert list(row_indices) == list(expected_indices)
+            assert np.allclose(row_scores, expected_scores)
+
+
+def test_dense_blocks_stay_within_the_value_budget(monkeypatch):
+    vectors = sparse.random(60, 40, density=0.2, random_state=7, format="csr")
+    rows = list(range(0, 60, 3))
+    expected_batch = SparseCosineIndex(vectors).neighbors_batch(rows, 5)
+    expected_index = build_neighbor_index_from_vectors(vectors, k=5)
+
+    # 130 values against 60 movies: blocks of 2 rows instead of 1024
+    assert neighbors.rows_per_block(60, 1024) == 1024 and neighbors.rows_per_block(10 ** 9, 1024) == 1
+    monkeypatch.setattr(neighbors, "BLOCK_VALUES", 130)
+    assert neighbors.rows_per_block(60, 1024) == 2
+    shapes = []
+    toarray = sparse.csr_matrix.toarray
+
+    def recording_toarray(matrix, *args, **kwargs):
+        shapes.append(matrix.shape)
+        return toarray(matrix, *args, **kwargs)
+
+    monkeypatch.setattr(sparse.csr_matrix, "toarray", recording_toarray)
+
+    indices, scores = SparseCosineIndex(vectors).neighbors_batch(rows, 5)
+    assert np.array_equal(indices, expected_batch[0]) and np.allclose(scores, expected_batch[1])
+    index = build_neighbor_index_from_vectors(vectors, k=5)
+    assert np.array_equal(index.indices, expected_index.indices)
+    assert shapes and max(height * width for height, width in shapes) <= 130
+
+
+def test_neighbors_multi_combines_seeds_and_excludes_them():
+    vectors = sparse.random(80, 30, density=0.3, random_state=3, format="csr")
+    normalized = vectors.toarray() / np.linalg.norm(vectors.toarray(), axis=1, keepdims=True)
+    seeds, weights = [4, 9, 17], [2.0, 1.0, 1.0]
+    query = np.average(normalized[seeds], axis=0, weights=weights)
+    expected = [i for i in np.argsort(-(normalized @ query), kind="stable") if i not in seeds][:5]
+
+    indices, scores = SparseCosineIndex(vectors).neighbors_multi(seeds, 5, weights=weights)
+    assert list(indices) == expected
+    assert list(scores) == sorted(scores, reverse=True)
+
+    ivf = IVFIndex(vectors, n_lists=4, n_probe=4)
+    assert list(ivf.neighbors_multi(seeds, 5, weights=weights)[0]) == expected
+
+    # A single seed is an ordinary neighbor query
+    index = build_neighbor_index_from_vectors(vectors, k=10)
+    assert list(index.neighbors_multi([4], 5)[0]) == list(index.neighbors(4, 5)[0])
+    combined, _ = index.neighbors_multi(seeds, 5, weights=weights)
+    assert not set(combined) & set(seeds)
+
+
+def test_neighbors_multi_validates_weights():
+    index = SparseCosineIndex(sparse.identity(5, format="csr"))
+    for weights in ([1.0], [0.0, 0.0], [1.0, -1.0]):
+        try:
+            index.neighbors_multi([0, 1], 2, weights=weights)
+        except ValueError:
+            continue
+        raise AssertionError(f"expected ValueError for weights {weights}")
@@ -0,0 +1,77 @@
+"""
+Tests for batch recommendations and metadata enrichment
+"""
+
+import numpy as np
+import pandas as pd
+
+from neighbors import NeighborIndex
+from recommender import Recommender, enrich
+
+
+def make_recommender():
+    movies = pd.DataFrame({
+        "movie_id": [10, 20, 30, 40],
+        "title": ["Avatar", "Alien", "Aliens", "Heat"],
+    })
+    index = NeighborIndex(
+        [[2, 1, 3], [2, 0, 3], [1, 0, 3], [0, 1, 2]],
+        [[0.9, 0.5, 0.1], [0.8, 0.5, 0.2], [0.8, 0.9, 0.1], [0.3, 0.2, 0.1]],
+    )
+    return Recommender(movies, index)
+
+
+def test_resolve_titles_and_movie_ids():
+    recommender = make_recommender()
+    assert recommender.resolve_many(["alien", 40, "missing", 99, True]) == [1, 3, None, None, None]
+    assert recommender.resolve("alie") == 1
+    assert recommender.resolve("alie", partial=False) is None
+
+
+def test_recommend_batch_keeps_seed_order_and_reports_misses():
+    results = make_recommender().recommend_batch(["Heat", 10, "nope", "Heat"], n=2)
+    assert [result["input"] for result in results] == ["Heat", 10, "nope", "Heat"]
+    assert results[0]["input_movie"] == "Heat" and results[0]["movie_id"] == 40
+    assert [r["title"] for r in results[0]["recommendations"]] == ["Avatar", "Alien"]
+    assert [r["movie_id"] for r in results[1]["recommendations"]] == [30, 20]
+    assert results[2] == {"input": "nope", "error": "Movie not found"}
+    assert results[3] == results[0] | {"input": "Heat"}
+    assert np.isclose(results[1]["recommendations"][0]["similarity_score"], 0.9)
+
+
+def test_enrich_fetches_each_movie_once():
+    class StubClient:
+        def __init__(self):
+            self.calls = []
+
+        def get_movies(self, movie_ids, deadline=None):
+            self.calls.append(sorted(movie_ids))
+            # Movie 30 misses the deadline
+            return {movie_id: {"poster_path": "/p.jpg", "rating": 7.0} for movie_id in movie_ids if movie_id != 30}
+
+    results = make_recommender().recommend_batch(["Avatar", "Alien"], n=2)
+    recommendations = [r for result in results for r in result["recommendations"]]
+    client = StubClient()
+    assert enrich(recommendations, client) is True
+    assert client.calls == [[10, 20, 30]]
+    assert recommendations[1]["poster_url"].endswith("/p.jpg") and recommendations[1]["rating"] == 7.0
+    assert recommendations[0]["poster_url"] is None and recommendations[0]["rating"] == "N/A"
+
+
+def test_recommend_multi_excludes_seeds_and_reports_misses():
+    result = make_recommender().recommend_multi(["Alien", "Aliens", "nope"], weights=[1, 1, 5], n=3)
+    assert result["input_movies"] == ["Alien", "Aliens"]
+    assert result["not_found"] == ["nope"]
+    assert [r["title"] for r in result["recommendations"]] == ["Avatar", "Heat"]
+    assert np.isclose(result["recommendations"][0]["similarity_score"], 0.7)
+
+
+def test_response_cache_belongs_to_the_loaded_model():
+    recommender = make_recommender()
+    recommender.cache.set((0, 5, True), {"input_movie": "Avatar"})
+    assert recommender.cache.get((0, 5, True)) == {"input_movie": "Avatar"}
+    assert recommender.cache.stats()["hits"] == 1
+
+    # A reloaded model starts with an empty cache
+    reloaded = make_recommender()
+    assert reloaded.cache.get((0, 5, True)) is None
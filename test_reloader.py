@@ -0,0 +1,93 @@
+"""
+Tests for hot-reloading the served model from versioned artifacts
+"""
+
+import threading
+
+import numpy as np
+
+from artifacts import artifact_version, load_model, publish_version, save_artifacts
+from neighbors import build_neighbor_index
+from reloader import ModelReloader
+
+
+def publish(root, version, titles):
+    vectors = np.eye(len(titles)) + 0.1
+    index = build_neighbor_index(vectors @ vectors.T, k=2)
+    save_artifacts(root / version, np.arange(len(titles)), titles, index, version=version)
+    publish_version(root, version)
+
+
+def load_titles(artifact_dir):
+    movies_df, _ = load_model(artifact_dir)
+    return movies_df["title"].tolist()
+
+
+def test_reload_swaps_in_the_published_version(tmp_path):
+    publish(tmp_path, "v1", ["A", "B", "C"])
+    models = ModelReloader(load_titles, path=tmp_path)
+    assert models.version == "v1" and models.current == ["A", "B", "C"]
+
+    # A request holding the old model keeps it while the new one is swapped in
+    in_flight = models.current
+    assert models.check() is False
+    publish(tmp_path, "v2", ["A", "B", "C", "D"])
+    assert artifact_version(tmp_path) == "v2"
+    assert models.check() is True
+    models.reload(wait=True)
+    assert models.version == "v2" and models.current == ["A", "B", "C", "D"]
+    assert in_flight == ["A", "B", "C"]
+
+
+def test_failed_reload_keeps_serving_the_old_model(tmp_path):
+    publish(tmp_path, "v1", ["A", "B", "C"])
+    models = ModelReloader(load_titles, path=tmp_path)
+    (tmp_path / "CURRENT").write_text("missing\n")
+
+    models.reload(wait=True)
+    assert models.current == ["A", "B", "C"] and models.version == "v1"
+    assert models.status()["last_error"]
+
+
+def test_failed_version_is_not_retried_until_a_new_one_is_published(tmp_path):
+    publish(tmp_path, "v1", ["A", "B", "C"])
+    loads = []
+
+    def counting_load(artifact_dir):
+        loads.append(artifact_dir)
+        return load_titles(artifact_dir)
+
+    models = ModelReloader(counting_load, path=tmp_path)
+    (tmp_path / "CURRENT").write_text("broken\n")
+    assert models.check() is True
+    models.reload(wait=True)  # waits for the reload check() started
+    assert len(loads) == 2 and models.version == "v1"
+
+    # The watcher leaves the broken version alone; an admin reload still tries it
+    assert models.check() is False
+    assert models.reload(wait=True) is True
+    assert len(loads) == 3
+
+    publish(tmp_path, "v2", ["A", "B", "C", "D"])
+    assert models.check() is True
+    models.reload(wait=True)
+    assert models.version == "v2" and models.check() is False
+
+
+def test_only_one_reload_runs_at_a_time(tmp_path):
+    publish(tmp_path, "v1", ["A", "B", "C"])
+    release = threading.Event()
+    loads = []
+
+    def slow_load(artifact_dir):
+        loads.append(artifact_dir)
+        if len(loads) > 1:
+            release.wait(5)
+        return load_titles(artifact_dir)
+
+    models = ModelReloader(slow_load, path=tmp_path)
+    assert models.reload() is True
+    assert models.reload() is False
+    release.set()
+    models.reload(wait=True)
+    assert models.status()["reloading"] is False
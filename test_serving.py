@@ -0,0 +1,245 @@
+"""
+Tests for the request parsing and payloads shared by the API servers, and their routes
+"""
+
+import importlib
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+import serving
+from artifacts import save_artifacts
+from cache import TTLCache
+from neighbors import NeighborIndex, SparseCosineIndex
+from serving import ServedModel, batch_payload, decode_cursor, encode_cursor, parse_batch, parse_multi
+from tmdb_client import TMDBClient
+
+TITLES = ["Avatar", "Alien", "Aliens", "Heat", "Up", "Jaws", "Rocky"]
+
+
+def make_model():
+    movie_ids = [10 * (row + 1) for row in range(len(TITLES))]
+    # Every movie's neighbors are the next five rows
+    index = NeighborIndex(
+        [[(row + offset) % len(TITLES) for offset in range(1, 6)] for row in range(len(TITLES))],
+        [[0.9, 0.7, 0.5, 0.3, 0.1]] * len(TITLES),
+    )
+    return movie_ids, index, ServedModel(pd.DataFrame({"movie_id": movie_ids, "title": TITLES}), index)
+
+
+def import_server(name, tmp_path, monkeypatch):
+    """The server module, which loads ./artifacts when first imported"""
+    movie_ids, index, _ = make_model()
+    save_artifacts(str(tmp_path / "artifacts"), movie_ids, TITLES, index)
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module(name)
+
+
+class OfflineAsyncTMDB:
+    """Stands in for AsyncTMDBClient with every lookup failing"""
+    failure_ttl = 60
+
+    def __init__(self):
+        self.cache = TTLCache()
+
+    async def get_movies(self, movie_ids, deadline=None):
+        return {movie_id: None for movie_id in movie_ids}
+
+
+@pytest.fixture
+def flask_client(tmp_path, monkeypatch):
+    flask_api = import_server("flask_api", tmp_path, monkeypatch)
+    monkeypatch.setattr(flask_api.models, "current", make_model()[2])
+    # Nothing listens on port 9: every metadata lookup fails at once
+    monkeypatch.setattr(flask_api, "tmdb", TMDBClient(api_url="http://127.0.0.1:9", timeout=1))
+    return flask_api.app.test_client()
+
+
+def test_flask_api_opens_no_tmdb_client_at_import(tmp_path, monkeypatch):
+    flask_api = import_server("flask_api", tmp_path, monkeypatch)
+    assert flask_api.tmdb is None
+    # Until init_worker runs in the serving process the TMDB cache is left out of /metrics
+    response = flask_api.app.test_client().get("/metrics")
+    assert response.status_code == 200 and 'cache="tmdb"' not in response.get_data(as_text=True)
+
+
+def test_parse_multi_validates_titles_and_weights():
+    assert parse_multi({"titles": ["Avatar", "Heat"]}) == (["Avatar", "Heat"], None)
+    assert parse_multi({"titles": ["Avatar"], "weights": [0.5]}) == (["Avatar"], [0.5])
+    for body in ({}, {"titles": []}, {"titles": "Avatar"}, {"titles": [["Avatar"], "Alien"]},
+                 {"titles": [{"title": "Avatar"}]}, {"titles": ["Avatar", ""]},
+                 {"titles": ["Avatar"], "weights": [1, 2]}, {"titles": ["Avatar"], "weights": [0]},
+                 {"titles": ["Avatar"], "weights": [True]}, {"titles": ["Avatar"], "weights": [-1]}):
+        with pytest.raises(ValueError):
+            parse_multi(body)
+
+
+def test_recommend_multi_route(flask_client):
+    response = flask_client.post("/recommend/multi", json={"titles": ["Avatar", "nope"], "weights": [1, 0.5]})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data["input_movies"] == ["Avatar"] and data["not_found"] == ["nope"]
+    assert [r["title"] for r in data["recommendations"]] == ["Alien", "Aliens", "Heat", "Up", "Jaws"]
+
+    assert flask_client.post("/recommend/multi", json={"titles": ["nope"]}).status_code == 404
+    response = flask_client.post("/recommend/multi", json={"titles": [["Avatar"], "Alien"]})
+    assert response.status_code == 400 and "strings" in response.get_json()["error"]
+
+
+def test_movies_pages_walk_to_the_end():
+    _, _, model = make_model()
+    items, cursor, pages = [], None, 0
+    while True:
+        args = {"limit": "3", "fields": "movie_id,title"}
+        if cursor:
+            args["cursor"] = cursor
+        page = json.loads(model.movies_response_for(args).body)
+        assert page["total"] == len(TITLES) and page["count"] == len(page["movies"])
+        items += page["movies"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == 3
+    assert items == [{"movie_id": 10 * (row + 1), "title": title} for row, title in enumerate(TITLES)]
+
+    # Without fields a page holds plain titles; without any parameter the full list
+    assert json.loads(model.movies_response_for({"limit": "2"}).body)["movies"] == ["Avatar", "Alien"]
+    assert json.loads(model.movies_response_for({}).body) == {"movies": TITLES, "count": len(TITLES)}
+    page = json.loads(model.movies_response_for({"fields": "movie_id", "limit": "1"}).body)
+    assert page["movies"] == [{"movie_id": 10}]
+
+
+def test_movies_rejects_invalid_parameters():
+    _, _, model = make_model()
+    assert decode_cursor(encode_cursor(5)) == 5
+    for args in ({"limit": "ten"}, {"limit": "0"}, {"limit": "-3"}, {"cursor": "%%%"}, {"cursor": "bm9wZQ"},
+                 {"cursor": encode_cursor(-1)}, {"fields": "title,budget"}):
+        with pytest.raises(ValueError):
+            model.movies_response_for(args)
+
+
+def test_movies_route_pages_and_conditional_requests(flask_client):
+    response = flask_client.get("/movies?limit=4&fields=title")
+    page = response.get_json()
+    assert response.status_code == 200 and page["count"] == 4 and page["next_cursor"]
+    last = flask_client.get(f"/movies?limit=4&fields=title&cursor={page['next_cursor']}").get_json()
+    assert [movie["title"] for movie in last["movies"]] == TITLES[4:] and last["next_cursor"] is None
+
+    etag = response.headers["ETag"]
+    assert flask_client.get("/movies?limit=4&fields=title", headers={"If-None-Match": etag}).status_code == 304
+    assert flask_client.get("/movies?limit=4&fields=title", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    for query in ("limit=x", "cursor=%25%25", "fields=budget"):
+        response = flask_client.get(f"/movies?{query}")
+        assert response.status_code == 400 and "error" in response.get_json()
+
+
+def test_parse_batch_limits(monkeypatch):
+    assert parse_batch({"titles": ["Heat"], "movie_ids": [10]}) == (["Heat", 10], 5, False, False)
+    assert parse_batch({"titles": ["he"], "k": "3", "partial": True, "enrich": 1}) == (["he"], 3, True, True)
+    assert parse_batch({"movie_ids": [10], "k": serving.BATCH_MAX_K})[1] == serving.BATCH_MAX_K
+
+    monkeypatch.setattr(serving, "BATCH_MAX_SEEDS", 3)
+    assert len(parse_batch({"movie_ids": [1, 2, 3]})[0]) == 3
+    for body in (None, {}, {"titles": []}, {"titles": "Heat"}, {"movie_ids": 10}, {"movie_ids": [1, 2, 3, 4]},
+                 {"titles": ["Heat"], "k": 0}, {"titles": ["Heat"], "k": serving.BATCH_MAX_K + 1},
+                 {"titles": ["Heat"], "k": "five"}, {"titles": [10]}, {"titles": ["Heat", ""]},
+                 {"movie_ids": ["10"]}, {"movie_ids": [10.5]}, {"movie_ids": [True]}):
+        with pytest.raises(ValueError):
+            parse_batch(body)
+
+
+def test_batch_payload_counts_misses():
+    results = [{"input": "Heat", "recommendations": []}, {"input": "nope", "error": "Movie not found"}]
+    assert batch_payload(results, True) == {"results": results, "count": 2, "not_found": 1, "partial": True}
+
+
+def test_recommend_batch_route_mixes_titles_and_movie_ids(flask_client):
+    body = {"titles": ["Heat", "nope"], "movie_ids": [10, 99], "k": 2}
+    response = flask_client.post("/recommend/batch", json=body)
+    data = response.get_json()
+    assert response.status_code == 200
+    assert (data["count"], data["not_found"], data["partial"]) == (4, 2, False)
+    assert [result["input"] for result in data["results"]] == ["Heat", "nope", 10, 99]
+    assert [r["title"] for r in data["results"][0]["recommendations"]] == ["Up", "Jaws"]
+    assert [r["movie_id"] for r in data["results"][2]["recommendations"]] == [20, 30]
+    assert "poster_url" not in data["results"][0]["recommendations"][0]
+
+    # Partial titles only on request; metadata of failed lookups shows as unavailable
+    body = {"titles": ["hea"], "partial": True, "enrich": True, "k": 2}
+    data = flask_client.post("/recommend/batch", json=body).get_json()
+    recommendation = data["results"][0]["recommendations"][0]
+    assert data["results"][0]["input_movie"] == "Heat"
+    assert recommendation["poster_url"] is None and recommendation["rating"] == "N/A"
+    assert flask_client.post("/recommend/batch", json={"titles": ["hea"], "k": 2}).get_json()["not_found"] == 1
+
+    for body in ({"titles": "Heat"}, {"titles": ["Heat"], "k": 50}, {}):
+        response = flask_client.post("/recommend/batch", json=body)
+        assert response.status_code == 400 and "error" in response.get_json()
+    # Movie IDs go in movie_ids only, titles in titles only
+    response = flask_client.post("/recommend/batch", json={"titles": ["Heat", 10]})
+    assert response.status_code == 400 and "strings" in response.get_json()["error"]
+    response = flask_client.post("/recommend/batch", json={"movie_ids": [10, "Heat"]})
+    assert response.status_code == 400 and "integers" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("name", ["flask_api", "async_api"])
+def test_malformed_json_bodies_are_bad_requests(name, tmp_path, monkeypatch):
+    if name == "async_api":
+        pytest.importorskip("starlette")
+        pytest.importorskip("httpx")
+        from starlette.testclient import TestClient
+    server = import_server(name, tmp_path, monkeypatch)
+    monkeypatch.setattr(server.models, "current", make_model()[2])
+    if name == "flask_api":
+        client = server.app.test_client()
+        post = lambda path, body: client.post(path, data=body, content_type="application/json")
+        payload = lambda response: response.get_json()
+    else:
+        client = TestClient(server.app)
+        post = lambda path, body: client.post(path, content=body, headers={"Content-Type": "application/json"})
+        payload = lambda response: response.json()
+
+    for path in ("/recommend", "/recommend/multi", "/recommend/batch"):
+        for body in ('{"title": "Avatar"', "[1, 2]", "null"):
+            response = post(path, body)
+            assert response.status_code == 400 and "error" in payload(response), (path, body)
+
+
+def test_async_routes_keep_cpu_work_off_the_event_loop(tmp_path, monkeypatch):
+    pytest.importorskip("starlette")
+    pytest.importorskip("httpx")
+    from starlette.testclient import TestClient
+
+    async_api = import_server("async_api", tmp_path, monkeypatch)
+    monkeypatch.setattr(async_api, "tmdb", OfflineAsyncTMDB())
+    offloaded = []
+    run_in_threadpool = async_api.run_in_threadpool
+
+    async def recording(func, *args, **kwargs):
+        offloaded.append(func.__name__)
+        return await run_in_threadpool(func, *args, **kwargs)
+
+    monkeypatch.setattr(async_api, "run_in_threadpool", recording)
+    client = TestClient(async_api.app)  # without lifespan: no real TMDB client
+
+    # The precomputed index and exact titles are answered inline
+    monkeypatch.setattr(async_api.models, "current", make_model()[2])
+    assert client.post("/recommend", json={"title": "Avatar"}).status_code == 200
+    assert offloaded == []
+    response = client.post("/recommend", json={"title": "ocky"})
+    assert response.json()["input_movie"] == "Rocky" and offloaded == ["resolve"]
+
+    # A vector backend scores the whole catalog, in the thread pool
+    vectors = sparse.csr_matrix(np.eye(len(TITLES)) + 0.1)
+    movies_df = pd.DataFrame({"movie_id": make_model()[0], "title": TITLES})
+    monkeypatch.setattr(async_api.models, "current", ServedModel(movies_df, SparseCosineIndex(vectors)))
+    offloaded.clear()
+    assert len(client.post("/recommend", json={"title": "Heat"}).json()["recommendations"]) == 5
+    response = client.post("/recommend/multi", json={"titles": ["Heat", "Up"]})
+    assert response.status_code == 200 and len(response.json()["recommendations"]) == 5
+    assert offloaded == ["recommend_row", "recommend_multi"]
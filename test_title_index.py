@@ -0,0 +1,87 @@
+"""
+Tests for title normalization and lookup
+"""
+
+from title_index import SearchIndex, TitleIndex, normalize_title, within_distance
+
+
+TITLES = ["Avatar", "Pirates of the Caribbean: At World's End", "The Host", "Avatar 2", "The Host", "Amélie"]
+
+
+def test_normalize_title():
+    assert normalize_title("  The   HOST ") == "the host"
+    assert normalize_title("Ａｖａｔａｒ") == "avatar"
+
+
+def test_exact_match_wins_over_earlier_partial_match():
+    index = TitleIndex(["Avatar 2", "Avatar"])
+    assert index.resolve("avatar") == 1
+
+
+def test_duplicates_resolve_to_lowest_row():
+    index = TitleIndex(TITLES)
+    assert index.rows("the host") == [2, 4]
+    assert index.resolve("The Host") == 2
+
+
+def test_partial_match_is_plain_text():
+    index = TitleIndex(TITLES)
+    assert index.resolve("caribbean: at") == 1
+    assert index.resolve("amél") == 5
+    # Regex metacharacters are matched literally instead of raising
+    assert index.resolve("(") is None
+    assert index.resolve("Avat.r") is None
+    assert index.resolve("pirates", partial=False) is None
+
+
+SEARCH_TITLES = ["Avatar", "Avatar 2", "The Avengers", "Pirates of the Caribbean: At World's End",
+                 "Caribbean Dreams", "Spectre", "Star Wars", "Avatar"]
+
+
+def titles_for(index, query, **kwargs):
+    rows, total = index.search(query, **kwargs)
+    return [SEARCH_TITLES[row] for row in rows], total
+
+
+def test_search_ranks_exact_then_prefix_then_word_prefix():
+    index = SearchIndex(SEARCH_TITLES)
+    assert titles_for(index, "avatar") == (["Avatar", "Avatar", "Avatar 2"], 3)
+    assert titles_for(index, "a")[0] == ["Avatar", "Avatar", "Avatar 2", "The Avengers",
+                                         "Pirates of the Caribbean: At World's End"]
+    assert titles_for(index, "carib")[0] == ["Caribbean Dreams", "Pirates of the Caribbean: At World's End"]
+    assert titles_for(index, "carib pir")[0] == ["Pirates of the Caribbean: At World's End"]
+
+
+def test_search_tolerates_typos_in_longer_words():
+    index = SearchIndex(SEARCH_TITLES)
+    assert titles_for(index, "avangers")[0] == ["The Avengers"]
+    assert titles_for(index, "pirates carribean")[0] == ["Pirates of the Caribbean: At World's End"]
+    # Exact matches still rank before typo matches
+    assert titles_for(index, "spectre")[0] == ["Spectre"]
+    assert titles_for(index, "stxr")[0] == ["Star Wars"]
+    assert titles_for(index, "sxxr") == ([], 0)
+
+
+def test_search_paginates():
+    index = SearchIndex(SEARCH_TITLES)
+    everything, total = titles_for(index, "a", limit=100)
+    page, page_total = titles_for(index, "a", limit=2, offset=2)
+    assert page == everything[2:4] and page_total == total == 5
+    assert titles_for(index, "  ") == ([], 0)
+
+
+def test_search_caches_only_a_prefix_of_the_ranking():
+    index = SearchIndex(SEARCH_TITLES, cached_rows=2)
+    everything, total = titles_for(index, "a", limit=100)
+    assert total == 5 and len(everything) == 5
+    rows, cached_total = index._cache.get("a")
+    assert len(rows) == 2 and cached_total == 5
+    # Pages inside the prefix come from the cache, deeper ones are ranked again
+    assert titles_for(index, "a", limit=2) == (everything[:2], 5)
+    assert titles_for(index, "a", limit=2, offset=3) == (everything[3:5], 5)
+
+
+def test_within_distance():
+    assert within_distance("avater", "avatar", 1)
+    assert not within_distance("avtr", "avatar", 1)
+    assert within_distance("carribean", "caribbean", 2)
@@ -0,0 +1,208 @@
+"""
+Tests for the pooled, cached TMDB client against a local stub server
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from cache import TTLCache
+from metadata_store import MetadataStore
+from prefetch_metadata import prefetch
+from tmdb_client import HealthProbe, TMDBClient, movie_details, poster_url
+
+
+def answer_movie(server, method, path, body):
+    movie_id = path.split("?")[0].rsplit("/", 1)[-1]
+    if movie_id.isdigit():
+        time.sleep(server.latency.get(int(movie_id), 0))
+    if not movie_id.isdigit() or movie_id == "404":
+        return 404, {"status_message": "not found"}
+    return 200, {
+        "id": int(movie_id),
+        "poster_path": f"/poster{movie_id}.jpg",
+        "vote_average": 7.5,
+        "release_date": "2009-12-10",
+        "runtime": 162,
+        "genres": [{"id": 28, "name": "Action"}],
+        "overview": "x" * 300,
+    }
+
+
+@pytest.fixture
+def stub_server(serve_stub):
+    server = serve_stub(answer_movie)
+    server.latency = {}  # movie_id -> seconds to wait before answering
+    return server
+
+
+def make_client(server, **kwargs):
+    return TMDBClient(api_url=f"http://127.0.0.1:{server.server_port}", api_key="test", **kwargs)
+
+
+def test_one_request_per_movie_feeds_poster_and_details(stub_server):
+    client = make_client(stub_server)
+    metadata = client.get_movie(19995)
+    assert poster_url(metadata) == "https://image.tmdb.org/t/p/w500/poster19995.jpg"
+    details = movie_details(metadata)
+    assert details["rating"] == 7.5 and details["runtime"] == 162 and details["genres"] == ["Action"]
+    assert details["overview"] == "x" * 200 + "..."
+
+    assert client.get_movie(19995) is metadata
+    assert len(stub_server.requests) == 1
+    assert client.cache.hits == 1 and client.cache.misses == 1
+
+
+def test_session_reuses_connections(stub_server):
+    client = make_client(stub_server)
+    for movie_id in range(10):
+        client.get_movie(movie_id)
+    assert len(stub_server.requests) == 10
+    assert len(stub_server.client_ports) == 1
+
+
+def test_failures_fall_back_and_are_cached_briefly(stub_server):
+    client = make_client(stub_server)
+    assert client.get_movie(404) is None
+    assert client.get_movie(404) is None
+    assert len(stub_server.requests) == 1
+    assert movie_details(None)["overview"] == "Details unavailable"
+    assert poster_url(None) is None
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
+
+
+def test_get_movies_fetches_concurrently(stub_server):
+    client = make_client(stub_server)
+    stub_server.latency.update({movie_id: 0.3 for movie_id in range(5)})
+    start = time.perf_counter()
+    results = client.get_movies([0, 1, 2, 3, 4, 4])
+    assert time.perf_counter() - start < 0.9
+    assert sorted(results) == [0, 1, 2, 3, 4]
+    assert all(results[movie_id]["runtime"] == 162 for movie_id in results)
+
+
+def test_get_movies_returns_partial_results_at_deadline(stub_server):
+    client = make_client(stub_server)
+    client.get_movie(1)
+    stub_server.latency[2] = 1.0
+    results = client.get_movies([1, 2, 3], deadline=0.3)
+    assert sorted(results) == [1, 3]
+
+    # The slow lookup finishes in the background and lands in the cache
+    time.sleep(1.0)
+    assert client.get_movies([2], deadline=0)[2]["poster_path"] == "/poster2.jpg"
+
+
+def test_iter_movies_yields_each_movie_as_it_arrives(stub_server):
+    client = make_client(stub_server)
+    client.get_movie(1)
+    stub_server.latency[2] = 0.5
+    start = time.perf_counter()
+    arrivals = [(movie_id, time.perf_counter() - start) for movie_id, _ in client.iter_movies([2, 1, 3])]
+    assert [movie_id for movie_id, _ in arrivals] == [1, 3, 2]
+    # The cached movie is handed over without waiting for the slow lookup
+    assert arrivals[0][1] < 0.1 and arrivals[2][1] >= 0.5
+
+
+def test_health_probe_reports_reachability(stub_server):
+    probe = HealthProbe(make_client(stub_server))
+    assert probe.online is None
+    assert probe.check() is True and probe.checked_at is not None
+
+    offline = HealthProbe(TMDBClient(api_url="http://127.0.0.1:9"), timeout=1)
+    assert offline.check() is False
+
+
+def test_metadata_store_round_trip(tmp_path):
+    store = MetadataStore(str(tmp_path / "metadata.db"))
+    movie = {"poster_path": "/a.jpg", "rating": 7.5, "release_date": "2009-12-10",
+             "runtime": 162, "genres": ["Action", "Adventure"], "overview": "Pandora"}
+    store.put(19995, movie)
+    assert store.get(19995) == movie
+    assert store.get(1) is None
+    assert store.missing([1, 19995, 2]) == [1, 2]
+    assert len(store) == 1
+
+
+def test_client_reads_store_before_network(stub_server, tmp_path):
+    store = MetadataStore(str(tmp_path / "metadata.db"))
+    store.put(7, {"poster_path": "/stored.jpg", "genres": []})
+
+    client = make_client(stub_server, store=store)
+    results = client.get_movies([7, 8])
+    assert results[7]["poster_path"] == "/stored.jpg"
+    assert results[8]["poster_path"] == "/poster8.jpg"
+    assert len(stub_server.requests) == 1
+
+    # Fetched movies are written back, so a fresh (offline) client finds them
+    offline = TMDBClient(api_url="http://127.0.0.1:9", store=store, timeout=0.5)
+    assert offline.get_movie(8)["runtime"] == 162
+
+
+def test_prefetch_fills_store_below_rate(stub_server, tmp_path):
+    store = MetadataStore(str(tmp_path / "metadata.db"))
+    client = make_client(stub_server, store=store)
+    start = time.perf_counter()
+    fetched, failed = prefetch(client, [1, 2, 3, 404, 5, 6], rate=20, workers=3)
+    assert (fetched, failed) == (5, 1)
+    assert time.perf_counter() - start >= 5 / 20
+    assert store.missing([1, 2, 3, 404, 5, 6]) == [404]
+
+
+def make_async_client(server, **kwargs):
+    from async_tmdb_client import AsyncTMDBClient
+    return AsyncTMDBClient(api_url=f"http://127.0.0.1:{server.server_port}", api_key="test", **kwargs)
+
+
+def test_async_client_shares_in_flight_fetches(stub_server):
+    pytest.importorskip("httpx")
+    stub_server.latency.update({movie_id: 0.3 for movie_id in range(5)})
+
+    async def run():
+        client = make_async_client(stub_server)
+        try:
+            # Two requests asking for overlapping movies at the same time
+            return await asyncio.gather(client.get_movies([0, 1, 2, 3]), client.get_movies([2, 3, 4, 404]))
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    first, second = asyncio.run(run())
+    assert time.perf_counter() - start < 0.9
+    assert sorted(first) == [0, 1, 2, 3] and first[2]["runtime"] == 162
+    assert second[4]["poster_path"] == "/poster4.jpg" and second[404] is None
+    assert len(stub_server.requests) == 6
+
+
+def test_async_client_deadline_and_store(stub_server, tmp_path):
+    pytest.importorskip("httpx")
+    store = MetadataStore(str(tmp_path / "metadata.db"))
+    store.put(7, {"poster_path": "/stored.jpg", "genres": []})
+    stub_server.latency[2] = 1.0
+
+    async def run():
+        client = make_async_client(stub_server, store=store)
+        try:
+            partial = await client.get_movies([7, 1, 2], deadline=0.3)
+            # The slow lookup keeps running and fills the cache
+            await asyncio.sleep(1.0)
+            return partial, await client.get_movies([2], deadline=0)
+        finally:
+            await client.close()
+
+    partial, later = asyncio.run(run())
+    assert sorted(partial) == [1, 7] and partial[7]["poster_path"] == "/stored.jpg"
+    assert later[2]["poster_path"] == "/poster2.jpg"
+    assert store.missing([1, 2, 7]) == []
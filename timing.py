@@ -0,0 +1,61 @@
+"""
+Per-stage wall time of one request, reported in a Server-Timing header
+
+Handlers wrap each stage in `with timer.stage(name):`. The stage times are
+always added to the request_stage_duration_seconds histogram of /metrics;
+the Server-Timing header is only sent when the client asks for it with
+`X-Server-Timing: 1` (or for every request with SERVER_TIMING=1), since it
+exposes server internals.
+"""
+
+import contextlib
+import os
+import time
+
+from metrics import STAGE_LATENCY
+
+# Send the Server-Timing header on every timed response
+SERVER_TIMING = os.environ.get("SERVER_TIMING") == "1"
+REQUEST_HEADER = "X-Server-Timing"
+
+
+class StageTimer:
+    """Wall time of the named stages of one request, in the order they ran"""
+
+    def __init__(self, route):
+        self.route = route
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self):
+        """Record the stages in the metrics and return the Server-Timing header value"""
+        total = time.perf_counter() - self.start
+        for name, seconds in self.stages.items():
+            STAGE_LATENCY.observe(seconds, self.route, name)
+        stages = list(self.stages.items()) + [("total", total)]
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages)
+
+
+def timing_requested(headers):
+    """Whether the response to a request with these headers carries Server-Timing"""
+    return SERVER_TIMING or headers.get(REQUEST_HEADER) == "1"
+
+
+def parse_server_timing(header):
+    """Stage name -> milliseconds of a Server-Timing header value"""
+    stages = {}
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                stages[name] = float(value)
+    return stages
@@ -0,0 +1,204 @@
+"""
+Title lookup for resolving the movie a user asked about, and the ranked
+search-as-you-type index behind /search
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+
+from cache import TTLCache
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_title(title):
+    """Case-, accent-width- and whitespace-insensitive form of a title"""
+    title = unicodedata.normalize("NFKC", str(title)).casefold()
+    return _WHITESPACE.sub(" ", title).strip()
+
+
+class TitleIndex:
+    """Normalized title -> catalog rows, built once when the model is loaded
+
+    Exact lookups are a single dict access. When several movies share a
+    title, the one with the lowest row index wins, so the same input always
+    resolves to the same movie.
+    """
+
+    def __init__(self, titles):
+        self.titles = [normalize_title(title) for title in titles]
+        self.rows_by_title = {}
+        for row, title in enumerate(self.titles):
+            self.rows_by_title.setdefault(title, []).append(row)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def rows(self, title):
+        """Every row whose title matches exactly (after normalization)"""
+        return self.rows_by_title.get(normalize_title(title), [])
+
+    def resolve(self, title, partial=True):
+        """Row of the movie best matching title, or None
+
+        Tries an exact match first; with partial=True falls back to the first
+        title containing the input as plain text (never as a regex).
+        """
+        query = normalize_title(title)
+        rows = self.rows_by_title.get(query)
+        if rows:
+            return rows[0]
+        if partial and query:
+            for row, candidate in enumerate(self.titles):
+                if query in candidate:
+                    return row
+        return None
+
+
+def tokenize(title):
+    """Words of a normalized title"""
+    return _TOKEN.findall(title)
+
+
+def within_distance(a, b, max_distance):
+    """True when the Levenshtein distance between a and b is at most max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+
+def _prefix_range(sorted_strings, prefix):
+    """Slice bounds of the strings starting with prefix in a sorted list"""
+    return (bisect_left(sorted_strings, prefix),
+            bisect_left(sorted_strings, prefix[:-1] + chr(ord(prefix[-1]) + 1)))
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex(TitleIndex):
+    """Ranked prefix and typo-tolerant title search
+
+    Matches are ranked in tiers: exact title, title prefix, every query word
+    a prefix of a title word, then the same allowing one or two typos in the
+    query words of 4+ characters. Inside a tier shorter
+    titles come first. The first cached_rows ranked rows and the match count
+    are cached per query, so repeated keystrokes and pagination are cheap
+    while a cache entry stays small even for one-letter queries on a large
+    catalog; pages past them are ranked again.
+    """
+
+    def __init__(self, titles, cache_size=2048, cached_rows=1000):
+        super().__init__(titles)
+        self.cached_rows = cached_rows
+        lengths = np.array([len(title) for title in self.titles], dtype=np.int32)
+        # Inside a tier shorter titles come first, then catalog order
+        self._display_order = np.lexsort((np.arange(len(lengths)), lengths)).astype(np.int32)
+
+        order = sorted(range(len(self.titles)), key=self.titles.__getitem__)
+        self._sorted_titles = [self.titles[row] for row in order]
+        self._sorted_title_rows = np.array(order, dtype=np.int32)
+
+        pairs = sorted({(token, row) for row, title in enumerate(self.titles) for token in tokenize(title)})
+        self._sorted_tokens = [token for token, _ in pairs]
+        self._sorted_token_rows = np.array([row for _, row in pairs], dtype=np.int32)
+
+        # Character trigrams of every distinct word, for typo-tolerant matching
+        self._vocabulary = list(dict.fromkeys(self._sorted_tokens))
+        self._words_by_trigram = {}
+        for word_id, word in enumerate(self._vocabulary):
+            for trigram in _trigrams(word):
+                self._words_by_trigram.setdefault(trigram, []).append(word_id)
+
+        self._cache = TTLCache(maxsize=cache_size)
+
+    def search(self, query, limit=20, offset=0):
+        """Rows of the matching titles, best first, and the total match count"""
+        query = normalize_title(query)
+        if not query:
+            return [], 0
+        ranked = None
+        cached = self._cache.get(query)
+        if cached is None:
+            ranked = self._rank(query)
+            # A copy, so the full ranking is not kept alive by the slice
+            cached = (ranked[:self.cached_rows].copy(), len(ranked))
+            self._cache.set(query, cached)
+        rows, total = cached
+        if offset + limit > len(rows) and len(rows) < total:
+            rows = ranked if ranked is not None else self._rank(query)
+        return rows[offset:offset + limit].tolist(), total
+
+    def _rank(self, query):
+        """Every matching row in rank order, using boolean masks over the catalog"""
+        tokens = tokenize(query)
+        tiers = [self._mask(self.rows_by_title.get(query, []))]
+
+        start, stop = _prefix_range(self._sorted_titles, query)
+        tiers.append(self._mask(self._sorted_title_rows[start:stop]))
+
+        if tokens:
+            prefix_masks = [self._mask(self._prefix_rows(token)) for token in tokens]
+            tiers.append(np.logical_and.reduce(prefix_masks))
+            typo_rows = [self._typo_rows(token) for token in tokens]
+            if any(rows is not None for rows in typo_rows):
+                for mask, rows in zip(prefix_masks, typo_rows):
+                    if rows is not None:
+                        mask[rows] = True
+                tiers.append(np.logical_and.reduce(prefix_masks))
+
+        ranked = []
+        seen = np.zeros(len(self.titles), dtype=bool)
+        for mask in tiers:
+            mask &= ~seen
+            seen |= mask
+            # Walking the precomputed (length, row) order avoids sorting per query
+            ranked.append(self._display_order[mask[self._display_order]])
+        return np.concatenate(ranked)
+
+    def _mask(self, rows):
+        mask = np.zeros(len(self.titles), dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def _prefix_rows(self, prefix):
+        start, stop = _prefix_range(self._sorted_tokens, prefix)
+        return self._sorted_token_rows[start:stop]
+
+    def _typo_rows(self, token):
+        """Rows with a word within 1 (4-7 chars) or 2 (8+ chars) typos of token"""
+        if len(token) < 4:
+            return None
+        max_distance = 1 if len(token) < 8 else 2
+        trigrams = _trigrams(token)
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self._words_by_trigram.get(trigram, ()))
+        # Each edit touches at most 3 trigrams (+1 for the end marker when the
+        # word continues past the input), so skip words sharing fewer
+        min_shared = max(len(trigrams) - 3 * max_distance - 1, 1)
+
+        rows = []
+        for word_id in (word_id for word_id, count in shared.items() if count >= min_shared):
+            word = self._vocabulary[word_id]
+            # Compare against the start of longer words so partial input still matches
+            if any(within_distance(token, word[:length], max_distance)
+                   for length in range(len(token) - max_distance, len(token) + max_distance + 1)):
+                start, stop = bisect_left(self._sorted_tokens, word), bisect_left(self._sorted_tokens, word + "\0")
+                rows.append(self._sorted_token_rows[start:stop])
+        return np.concatenate(rows) if rows else np.array([], dtype=np.int32)
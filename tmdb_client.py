@@ -0,0 +1,214 @@
+"""
+TMDB metadata client shared by the Flask API and the Streamlit app
+
+One pooled requests.Session, one /movie/{id} request per movie (feeding both
+the poster and the details) and an in-memory TTL + LRU cache. get_movies
+fans the lookups for several movies out over a bounded thread pool;
+iter_movies hands each result over as soon as it arrives. HealthProbe checks
+in the background whether TMDB can be reached.
+
+With a MetadataStore attached, lookups go memory cache -> on-disk store ->
+TMDB, and every successful fetch is written back to the store.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import TTLCache
+from metrics import observe_tmdb
+
+TMDB_API_URL = os.environ.get("TMDB_API_URL", "https://api.themoviedb.org/3")
+TMDB_API_KEY = os.environ.get("TMDB_API_KEY", "75b3c80c1a67275c04868a92f6f50a4b")
+POSTER_BASE_URL = "https://image.tmdb.org/t/p/w500/"
+
+
+class TMDBClient:
+    """Fetches and caches movie metadata from the TMDB API"""
+
+    def __init__(self, api_url=TMDB_API_URL, api_key=TMDB_API_KEY, timeout=5,
+                 cache_size=4096, cache_ttl=24 * 3600, failure_ttl=60, pool_size=20, max_concurrency=10,
+                 store=None):
+        self.api_url = api_url.rstrip("/")
+        self.store = store
+        self.api_key = api_key
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Bounds the number of TMDB requests in flight across all callers
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="tmdb")
+
+    def get_movie(self, movie_id):
+        """Metadata for one movie, or None when TMDB is unavailable"""
+        movie_id = int(movie_id)
+        cached = self.cache.get(movie_id, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        if self.store is not None:
+            stored = self.store.get(movie_id)
+            if stored is not None:
+                self.cache.set(movie_id, stored)
+                return stored
+        return self.fetch(movie_id)
+
+    def fetch(self, movie_id):
+        """Request one movie from TMDB, bypassing the caches, and cache the result"""
+        movie_id = int(movie_id)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(
+                f"{self.api_url}/movie/{movie_id}",
+                params={"api_key": self.api_key},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            movie = parse_movie(response.json())
+        except (requests.RequestException, ValueError):
+            observe_tmdb(False, time.perf_counter() - start)
+            # Remember failures briefly so an outage doesn't cost a timeout per call
+            self.cache.set(movie_id, None, ttl=self.failure_ttl)
+            return None
+
+        observe_tmdb(True, time.perf_counter() - start)
+        self.cache.set(movie_id, movie)
+        if self.store is not None:
+            self.store.put(movie_id, movie)
+        return movie
+
+    def get_movies(self, movie_ids, deadline=None):
+        """Metadata for several movies, fetched concurrently
+
+        Returns a dict of movie_id -> metadata (None when TMDB failed). Movies
+        whose lookup is still running after deadline seconds are left out;
+        those lookups finish in the background and fill the cache for the
+        next request.
+        """
+        return dict(self.iter_movies(movie_ids, deadline=deadline))
+
+    def iter_movies(self, movie_ids, deadline=None):
+        """(movie_id, metadata) pairs of several movies, each as soon as it is known
+
+        Cached and stored movies come first, then TMDB lookups in the order they
+        finish. Stops after deadline seconds like get_movies.
+        """
+        known = {}
+        misses = []
+        for movie_id in dict.fromkeys(int(movie_id) for movie_id in movie_ids):
+            cached = self.cache.get(movie_id, _MISSING)
+            if cached is not _MISSING:
+                known[movie_id] = cached
+            else:
+                misses.append(movie_id)
+
+        if misses and self.store is not None:
+            for movie_id, stored in self.store.get_many(misses).items():
+                self.cache.set(movie_id, stored)
+                known[movie_id] = stored
+            misses = [movie_id for movie_id in misses if movie_id not in known]
+
+        # Start the lookups before handing anything over
+        pending = {self.executor.submit(self.fetch, movie_id): movie_id for movie_id in misses}
+        yield from known.items()
+        if pending:
+            try:
+                for future in as_completed(pending, timeout=deadline):
+                    yield pending[future], future.result()
+            except TimeoutError:
+                pass
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+class HealthProbe:
+    """Whether TMDB is reachable, checked by a daemon thread every interval seconds
+
+    online holds the outcome of the last check (None before the first one has
+    finished), so reading it never waits on the network. Any client with a
+    requests session and an api_url can be probed, at api_url + path.
+    """
+
+    def __init__(self, client, interval=30, timeout=5, path=""):
+        self.client = client
+        self.path = path
+        self.interval = interval
+        self.timeout = timeout
+        self.online = None
+        self.checked_at = None
+        self._thread = None
+
+    def check(self):
+        """Request the API once; any HTTP answer counts as reachable"""
+        try:
+            self.client.session.get(self.client.api_url + self.path, timeout=self.timeout)
+            self.online = True
+        except requests.RequestException:
+            self.online = False
+        self.checked_at = time.time()
+        return self.online
+
+    def start(self):
+        def poll():
+            while True:
+                self.check()
+                time.sleep(self.interval)
+
+        self._thread = threading.Thread(target=poll, name="tmdb-probe", daemon=True)
+        self._thread.start()
+        return self
+
+
+def parse_movie(data):
+    """Keep only the fields the apps display from a /movie/{id} response"""
+    return {
+        "poster_path": data.get("poster_path"),
+        "rating": data.get("vote_average"),
+        "release_date": data.get("release_date"),
+        "runtime": data.get("runtime"),
+        "genres": [genre["name"] for genre in data.get("genres") or []],
+        "overview": data.get("overview"),
+    }
+
+
+def poster_url(movie):
+    """Full poster URL, or None when there is no poster"""
+    if movie and movie.get("poster_path"):
+        return POSTER_BASE_URL + movie["poster_path"].lstrip("/")
+    return None
+
+
+def movie_details(movie, overview_length=200, unavailable="Details unavailable"):
+    """Rating, release date, overview, runtime and genres for display"""
+    if movie is None:
+        return {
+            "rating": "N/A",
+            "release_date": "N/A",
+            "overview": unavailable,
+            "runtime": "N/A",
+            "genres": []
+        }
+    overview = movie.get("overview")
+    return {
+        "rating": _or_na(movie.get("rating")),
+        "release_date": _or_na(movie.get("release_date")),
+        "overview": overview[:overview_length] + "..." if overview else "No overview available",
+        "runtime": _or_na(movie.get("runtime")),
+        "genres": movie.get("genres") or []
+    }
+
+
+def _or_na(value):
+    return "N/A" if value is None else value
+
+
+_MISSING = object()
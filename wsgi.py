@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Production entry point of the Flask API
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Run directly (python wsgi.py), it execs gunicorn with gunicorn.conf.py, or
+serves with waitress on Windows where gunicorn is not available, and falls
+back to the development server when neither is installed.
+"""
+
+import os
+import shutil
+import sys
+
+
+def main():
+    gunicorn = shutil.which("gunicorn")
+    if gunicorn and os.name != "nt":
+        print("🚀 Starting Flask API with gunicorn (gunicorn.conf.py)")
+        # Replaces this process, so the model is only loaded by gunicorn
+        os.execv(gunicorn, [gunicorn, "-c", "gunicorn.conf.py", "wsgi:app"])
+
+    from flask_api import app, init_worker
+    init_worker()
+    try:
+        from waitress import serve
+    except ImportError:
+        print("⚠️ gunicorn/waitress not installed, using the development server")
+        app.run(host="0.0.0.0", port=5000, threaded=True)
+        return 0
+
+    threads = int(os.environ.get("API_THREADS", 8))
+    print(f"🚀 Starting Flask API with waitress ({threads} threads)")
+    serve(app, host="0.0.0.0", port=5000, threads=threads)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+else:
+    # Imported by the WSGI server: expose the application
+    from flask_api import app  # noqa: F401